@@ -1,3 +1,4 @@
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +12,36 @@ class Settings(BaseSettings):
     points_fuzzy: int = 50
     max_players_per_room: int = 8
     suggestions_enabled_default: bool = True
+    # Push a `tick` to every socket each second. Clients count down locally
+    # from `round_ends_at`, so this is only needed for older clients.
+    server_ticks: bool = False
+    # Per-socket ingress limits and outbound buffering.
+    ws_max_message_bytes: int = 4096
+    ws_messages_per_second: float = 5.0
+    ws_message_burst: int = 10
+    ws_suggest_per_second: float = 20.0
+    ws_suggest_burst: int = 20
+    ws_outbound_queue: int = 32
+    max_answer_length: int = 200
+    room_state_coalesce_ms: int = 50
+    # Reconnecting clients replay missed broadcasts from a per-room buffer;
+    # players whose socket stays gone past the grace period are removed.
+    ws_resume_buffer: int = Field(16, ge=1)
+    disconnect_grace_seconds: float = 3.0
+    cover_cache_bytes: int = 32 * 1024 * 1024
+    # Question sampling: 0 draws uniformly, higher favours popular titles.
+    question_weight_exponent: float = 0.5
+    recent_questions_per_room: int = 200
+    candidate_cache_size: int = 128
+    # Budget for per-configuration suggestion indexes (least recently used go first).
+    suggest_index_cache_bytes: int = 16 * 1024 * 1024
+    # Room journal for crash recovery (relative to the backend directory;
+    # empty disables it). Restored players who don't reconnect within the
+    # grace period are removed.
+    journal_path: str = "data/room_journal.jsonl"
+    journal_commit_ms: int = 50
+    journal_snapshot_seconds: float = 30.0
+    journal_resume_grace_seconds: float = 60.0
 
     class Config:
         env_file = ".env"
@@ -1,20 +1,29 @@
 import asyncio
+import hashlib
+import json
 import re
 import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 import httpx
 from pydantic import BaseModel, Field
-from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect, Depends, HTTPException
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.security import APIKeyHeader
 from starlette import status
 
 from config import settings
 from services.pool import load_pool, suggest_titles, get_available_genres
+from services.profiling import PROFILER
+from services import metrics, tracing
+from services.connection import ClientConnection
+from services.journal import RoomJournal
+from services.protocol import JSON, decode, encode, negotiate_encoding
 from services.room_manager import rooms
+from services.session import EventLog, GraceTimers
 
 # ── API Key Security ────────────────────────────────────────────────────────
 
@@ -32,14 +41,70 @@ async def get_api_key(api_key: str = Depends(api_key_header)):
 
 POOL_PATH = Path(__file__).parent / settings.pool_path
 
+async def _monitor_event_loop_lag(interval: float = 0.5):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        metrics.EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
+
+
+async def _snapshot_rooms(journal: RoomJournal, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        journal.snapshot(rooms.snapshot())
+
+
+def _restore_rooms(pool: list[dict]) -> RoomJournal:
+    journal = RoomJournal(Path(__file__).parent / settings.journal_path, settings.journal_commit_ms / 1000)
+    started = time.perf_counter()
+    snapshot, events = journal.read()
+    restored = rooms.restore(snapshot, events, pool)
+    rooms.journal = journal
+    journal.start()
+    if restored:
+        print(f"Restored {restored} rooms from the journal ({len(events)} events) in {time.perf_counter() - started:.3f}s")
+    for code in rooms.codes_in_phase("playing"):
+        # Players were cut off mid-round, so it gets a fresh deadline but
+        # keeps the answers that were journaled. A room caught in the
+        # intermission moves on to its next round.
+        if rooms.get_room(code).current_question:
+            rooms.reset_round_deadline(code)
+        else:
+            rooms.start_round(code)
+        _room_timer_tasks[code] = asyncio.create_task(_run_round_timer(code))
+    for code in rooms.room_codes():
+        for player_id in rooms.player_ids(code):
+            _schedule_player_cleanup(code, player_id, settings.journal_resume_grace_seconds)
+    return journal
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global _http_client
     # Pre-load the pool on server startup to populate genres list etc.
     print("Loading manhwa pool...")
-    load_pool(str(POOL_PATH))
+    started = time.perf_counter()
+    pool = load_pool(str(POOL_PATH))
+    metrics.POOL_LOAD_SECONDS.set(time.perf_counter() - started)
+    metrics.POOL_TITLES.set(len(pool))
+    _precompute_responses()
     print("Pool loaded.")
+    grace_sweeper = asyncio.create_task(_grace_timers.run())
+    journal = _restore_rooms(pool) if settings.journal_path else None
+    if journal:
+        snapshotter = asyncio.create_task(_snapshot_rooms(journal, settings.journal_snapshot_seconds))
+    _http_client = httpx.AsyncClient(timeout=15.0)
+    lag_monitor = asyncio.create_task(_monitor_event_loop_lag())
     yield
-    # No cleanup needed
+    lag_monitor.cancel()
+    grace_sweeper.cancel()
+    await _http_client.aclose()
+    if journal:
+        snapshotter.cancel()
+        # A clean shutdown leaves just a snapshot, so the next start is one read.
+        journal.snapshot(rooms.snapshot())
+        rooms.journal = None
+        await asyncio.to_thread(journal.close)
 
 # ── FastAPI App Initialization ──────────────────────────────────────────────
 
@@ -52,6 +117,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics.callback_gauge(
+    "manhwa_rooms_active", "Rooms held in memory by phase", ("phase",),
+    lambda: {phase: n for phase, (n, _) in rooms.stats_by_phase().items()},
+)
+metrics.callback_gauge(
+    "manhwa_ws_connections_active", "Open room sockets by room phase", ("phase",),
+    lambda: {phase: n for phase, (_, n) in rooms.stats_by_phase().items()},
+)
+metrics.callback_gauge(
+    "manhwa_journal_backlog", "Room journal events waiting for the writer thread", (),
+    lambda: {(): rooms.journal.backlog() if rooms.journal else 0},
+)
+metrics.callback_gauge(
+    "manhwa_disconnect_grace_pending", "Disconnected players waiting out the reconnect grace period", (),
+    lambda: {(): len(_grace_timers)},
+)
+
 # ── API Models ──────────────────────────────────────────────────────────────
 
 class CreateRoomRequest(BaseModel):
@@ -77,15 +159,47 @@ def _normalize_custom_code(raw: str | None) -> str | None:
         return None
     return code
 
+def _encode_json(payload) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _json_response(payload) -> Response:
+    return Response(content=_encode_json(payload), media_type="application/json")
+
+
+# Pool-derived bodies never change after startup, so encode them once.
+_PRECOMPUTED: dict[str, tuple[bytes, str]] = {}  # name -> (body, etag)
+
+
+def _precompute_responses():
+    for name, payload in {"genres": {"genres": get_available_genres()}}.items():
+        body = _encode_json(payload)
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        _PRECOMPUTED[name] = (body, etag)
+
+
+def _precomputed_response(request: Request, name: str) -> Response:
+    body, etag = _PRECOMPUTED[name]
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 # ── API Endpoints ───────────────────────────────────────────────────────────
 
 @app.get("/api/health", dependencies=[])
-def health():
+async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/api/rooms", dependencies=[Depends(get_api_key)])
-def create_room(payload: CreateRoomRequest | None = None):
+async def create_room(payload: CreateRoomRequest | None = None):
     body = payload or CreateRoomRequest()
     custom_code = _normalize_custom_code(body.room_code)
     if body.room_code and not custom_code:
@@ -108,51 +222,214 @@ def create_room(payload: CreateRoomRequest | None = None):
 
 
 @app.get("/api/rooms/{room_code}", dependencies=[Depends(get_api_key)])
-def get_room(room_code: str):
+async def get_room(room_code: str):
     if not rooms.room_exists(room_code):
         return {"exists": False}
     return {"exists": True}
 
 
+@app.get("/api/rooms/{room_code}/results", dependencies=[Depends(get_api_key)])
+async def get_room_results(
+    room_code: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=50),
+):
+    page = rooms.result_page(room_code, offset, limit)
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="room_not_found")
+    return Response(content=page, media_type="application/json")
+
+
 @app.get("/api/genres", dependencies=[Depends(get_api_key)])
-def get_genres():
-    return {"genres": get_available_genres()}
+async def get_genres(request: Request):
+    return _precomputed_response(request, "genres")
 
 
 @app.get("/api/suggest", dependencies=[Depends(get_api_key)])
-def suggest(
-    q: str = Query("", min_length=0),
+async def suggest(
+    q: str = Query("", min_length=0, max_length=settings.max_answer_length),
     limit: int = Query(10, ge=1, le=20),
+    room_code: str | None = Query(None),
+):
+    started = time.perf_counter()
+    suggestions = suggest_titles(q, limit, rooms.suggestion_scope(room_code) if room_code else None)
+    metrics.SUGGEST_LATENCY.labels("http").observe(time.perf_counter() - started)
+    return _json_response({"suggestions": suggestions})
+
+
+@app.post("/api/admin/profile", dependencies=[Depends(get_api_key)])
+async def admin_profile(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=100),
+):
+    try:
+        folded, samples = await PROFILER.profile(seconds, interval_ms / 1000)
+    except RuntimeError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    return PlainTextResponse(folded, headers={"X-Profile-Samples": str(samples)})
+
+
+@app.post("/api/admin/tracing", dependencies=[Depends(get_api_key)])
+async def admin_set_tracing(
+    enabled: bool = Query(...),
+    capacity: int | None = Query(None, ge=100, le=100_000),
 ):
-    return {"suggestions": suggest_titles(q, limit)}
+    if enabled:
+        tracing.TRACER.enable(capacity)
+    else:
+        tracing.TRACER.disable()
+    return {"enabled": tracing.TRACER.enabled}
+
+
+@app.get("/api/admin/tracing", dependencies=[Depends(get_api_key)])
+async def admin_get_tracing(
+    room_code: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+):
+    return tracing.TRACER.summary(room=room_code.upper() if room_code else None, limit=limit)
+
+
+_http_client: httpx.AsyncClient | None = None
+_cover_cache: OrderedDict[str, tuple[bytes, str]] = OrderedDict()  # url -> (body, content type)
+_cover_cache_bytes = 0
+
+
+def _cache_cover(url: str, body: bytes, content_type: str):
+    global _cover_cache_bytes
+    if len(body) > settings.cover_cache_bytes // 4:
+        return
+    _cover_cache[url] = (body, content_type)
+    _cover_cache_bytes += len(body)
+    while _cover_cache_bytes > settings.cover_cache_bytes:
+        _, (evicted, _) = _cover_cache.popitem(last=False)
+        _cover_cache_bytes -= len(evicted)
 
 
 @app.get("/api/covers/{manga_id}/{filename:path}")
 async def proxy_cover(manga_id: str, filename: str):
     url = f"https://uploads.mangadex.org/covers/{manga_id}/{filename}"
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        return StreamingResponse(
-            r.iter_bytes(),
-            media_type=r.headers.get("content-type", "image/jpeg"),
-            headers={"Cache-Control": "public, max-age=86400"},
-        )
+    headers = {"Cache-Control": "public, max-age=86400"}
+    cached = _cover_cache.get(url)
+    if cached:
+        _cover_cache.move_to_end(url)
+        metrics.COVER_REQUESTS.labels("hit").inc()
+        metrics.COVER_BYTES.labels("cache").inc(len(cached[0]))
+        return Response(content=cached[0], media_type=cached[1], headers=headers)
+
+    started = time.perf_counter()
+    r = await _http_client.get(url)
+    metrics.COVER_UPSTREAM_LATENCY.observe(time.perf_counter() - started)
+    if r.is_error:
+        metrics.COVER_REQUESTS.labels("error").inc()
+    r.raise_for_status()
+    metrics.COVER_REQUESTS.labels("miss").inc()
+    metrics.COVER_BYTES.labels("upstream").inc(len(r.content))
+    content_type = r.headers.get("content-type", "image/jpeg")
+    _cache_cover(url, r.content, content_type)
+    return Response(content=r.content, media_type=content_type, headers=headers)
 
 
 _room_timer_tasks: dict[str, asyncio.Task] = {}
-
-
-async def _broadcast_room_state(room_code: str):
+_round_wake: dict[str, asyncio.Event] = {}
+_pending_room_state: set[str] = set()
+_room_events: dict[str, EventLog] = {}
+
+
+def _event_log(room_code: str) -> EventLog:
+    log = _room_events.get(room_code)
+    if log is None:
+        log = _room_events[room_code] = EventLog(settings.ws_resume_buffer)
+    return log
+
+
+def _broadcast(room_code: str, message: dict):
+    # Encode once per wire format rather than once per connection; each
+    # socket's outbound queue takes care of slow readers.
+    started = time.perf_counter()
+    kind = message.get("event")
+    log = _event_log(room_code) if kind != "tick" else None
+    if log is not None:
+        message = {**message, "seq": log.next_seq()}
+    with tracing.span(f"broadcast.{kind}", room_code):
+        frames: dict[str, str | bytes] = {}
+        sent = 0
+        for conn in list(rooms.get_connections(room_code)):
+            frame = frames.get(conn.encoding)
+            if frame is None:
+                with tracing.span(f"encode.{conn.encoding}", room_code):
+                    frame = frames[conn.encoding] = encode(message, conn.encoding)
+                metrics.BROADCAST_BYTES.labels(kind).observe(len(frame))
+            sent += conn.push(frame, kind)
+        if log is not None:
+            # Only the encodings in use now; a resuming socket that needs
+            # another one gets it encoded lazily from the message.
+            log.record(message["seq"], kind, message, frames)
+    metrics.BROADCAST_RECIPIENTS.labels(kind).inc(sent)
+    metrics.BROADCAST_DURATION.labels(kind).observe(time.perf_counter() - started)
+
+
+def _broadcast_room_state(room_code: str):
     code = (room_code or "").upper()
     state = rooms.state_for_room(code)
     if state.get("error"):
         return
-    for conn in list(rooms.get_connections(code)):
-        try:
-            await conn.send_json({"event": "room_state", "state": state})
-        except Exception:
-            rooms.leave_connection(conn)
+    _broadcast(code, {"event": "room_state", "state": state})
+
+
+def _schedule_room_state(room_code: str):
+    # Coalesce bursts of answers/leaves into one snapshot per room.
+    code = (room_code or "").upper()
+    if code in _pending_room_state:
+        return
+    _pending_room_state.add(code)
+
+    async def flush():
+        await asyncio.sleep(settings.room_state_coalesce_ms / 1000)
+        _pending_room_state.discard(code)
+        _broadcast_room_state(code)
+
+    asyncio.create_task(flush())
+
+
+async def _wait_for_wake(room_code: str, timeout: float):
+    event = _round_wake.setdefault(room_code, asyncio.Event())
+    try:
+        await asyncio.wait_for(event.wait(), timeout=max(0, timeout))
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        event.clear()
+
+
+def _expire_player(key: tuple[str, str]):
+    room_code, player_id = key
+    if not rooms.remove_player_if_inactive(room_code, player_id):
+        return
+    if rooms.room_exists(room_code):
+        _broadcast_room_state(room_code)
+    else:
+        _room_events.pop(room_code, None)
+
+
+_grace_timers = GraceTimers(_expire_player)
+
+
+def _schedule_player_cleanup(room_code: str, player_id: str, delay: float):
+    _grace_timers.schedule((room_code, player_id), delay)
+
+
+def _missed_events(room_code: str, last_seq: int, encoding: str) -> list[tuple[str, str | bytes]] | None:
+    """Broadcasts a resuming client missed, or None if it needs a full resync."""
+    missed = _event_log(room_code).since(last_seq, encoding)
+    if missed is None or len(missed) > settings.ws_outbound_queue // 2:
+        return None
+    return missed
+
+
+def _wake_round_timer(room_code: str):
+    event = _round_wake.get((room_code or "").upper())
+    if event is not None:
+        event.set()
 
 
 async def _run_round_timer(room_code: str):
@@ -167,27 +444,23 @@ async def _run_round_timer(room_code: str):
                 room = rooms.get_room(code)
                 if not room or room.phase != "playing":
                     return
-                remaining = max(0, int(room.round_ends_at - time.time()))
-                for conn in list(rooms.get_connections(code)):
-                    try:
-                        await conn.send_json({"event": "tick", "seconds_left": remaining})
-                    except Exception:
-                        rooms.leave_connection(conn)
+                remaining = room.round_ends_at - time.time()
+                if settings.server_ticks:
+                    _broadcast(code, {"event": "tick", "seconds_left": max(0, int(remaining))})
                 if rooms.all_players_answered(code):
                     break
                 if remaining <= 0:
+                    metrics.ROUND_TIMER_LATENESS.observe(-remaining)
                     break
-                await asyncio.sleep(1)
+                # Tickless rooms sleep until the deadline; answers and
+                # disconnects wake the timer early via _wake_round_timer.
+                await _wait_for_wake(code, min(1, remaining) if settings.server_ticks else remaining)
 
             result = rooms.end_round_and_advance(code)
             if not result:
                 return
 
-            for conn in list(rooms.get_connections(code)):
-                try:
-                    await conn.send_json({"event": result["event"], **result})
-                except Exception:
-                    rooms.leave_connection(conn)
+            _broadcast(code, {"event": result["event"], **result})
 
             if result.get("event") == "game_over":
                 return
@@ -199,13 +472,62 @@ async def _run_round_timer(room_code: str):
                 return
             state = rooms.state_for_room(code)
             state["round_ends_at"] = room.round_ends_at
-            for conn in list(rooms.get_connections(code)):
-                try:
-                    await conn.send_json({"event": "round_start", "state": state})
-                except Exception:
-                    rooms.leave_connection(conn)
+            _broadcast(code, {"event": "round_start", "state": state})
     finally:
         _room_timer_tasks.pop(code, None)
+        _round_wake.pop(code, None)
+
+
+CLIENT_MESSAGE_TYPES = ("suggest", "start_game", "submit_answer")
+
+
+def _handle_client_message(conn: ClientConnection, code: str, player_id: str, owner_id: str | None, data: dict):
+    msg_type = data.get("type") or data.get("event")
+    label = msg_type if msg_type in CLIENT_MESSAGE_TYPES else "other"
+    with tracing.span(f"ws.{label}", code):
+        if msg_type == "suggest":
+            # Keystroke traffic has its own budget so typing can't starve answers.
+            if not conn.suggest_bucket.allow():
+                metrics.WS_MESSAGES_THROTTLED.labels("suggest").inc()
+                return
+            r = rooms.get_room(code)
+            q = str(data.get("q") or "")[:settings.max_answer_length]
+            limit = data.get("limit")
+            limit = min(max(limit, 1), 20) if isinstance(limit, int) else 10
+            started = time.perf_counter()
+            suggestions = suggest_titles(q, limit, rooms.suggestion_scope(code)) if r and r.suggestions_enabled else []
+            metrics.SUGGEST_LATENCY.labels("ws").observe(time.perf_counter() - started)
+            conn.send({"event": "suggestions", "id": data.get("id"), "suggestions": suggestions})
+            return
+
+        allowed = conn.bucket.allow()
+        if not allowed:
+            metrics.WS_MESSAGES_THROTTLED.labels(label).inc()
+        if msg_type == "start_game":
+            if not allowed:
+                return
+            r = rooms.get_room(code)
+            is_owner = r and (r.owner_id == owner_id)
+            if not is_owner:
+                return
+            if rooms.start_game(code, str(POOL_PATH)):
+                rooms.start_round(code)
+                r = rooms.get_room(code)
+                state = rooms.state_for_room(code)
+                state["round_ends_at"] = r.round_ends_at
+                _broadcast(code, {"event": "round_start", "state": state})
+                if code not in _room_timer_tasks:
+                    _room_timer_tasks[code] = asyncio.create_task(_run_round_timer(code))
+        elif msg_type == "submit_answer":
+            # Always keep the latest answer (a cheap overwrite); only journal,
+            # acknowledge and fan out while the client is within budget.
+            answer = str(data.get("answer") or "")[:settings.max_answer_length]
+            rooms.submit_answer(code, player_id, answer, journal=allowed)
+            if rooms.all_players_answered(code):
+                _wake_round_timer(code)
+            if allowed:
+                conn.send({"event": "answer_received"})
+                _schedule_room_state(code)
 
 
 @app.websocket("/ws")
@@ -215,61 +537,89 @@ async def websocket_endpoint(
     player_name: str = Query("Player"),
     owner_id: str = Query(None),
     player_id: str = Query(None),
+    encoding: str = Query(JSON),
+    resume_token: str = Query(None),
+    last_seq: int = Query(None),
 ):
     await ws.accept()
-    code = (room_code or "").upper()
+    conn = ClientConnection(
+        ws,
+        encoding=negotiate_encoding(encoding),
+        max_queue=settings.ws_outbound_queue,
+        rate=settings.ws_messages_per_second,
+        burst=settings.ws_message_burst,
+        suggest_rate=settings.ws_suggest_per_second,
+        suggest_burst=settings.ws_suggest_burst,
+        room_code=(room_code or "").upper(),
+    )
+    code = conn.room_code
     if not rooms.room_exists(code):
-        await ws.send_json({"event": "error", "message": "room_not_found"})
+        await conn.send_now({"event": "error", "message": "room_not_found"})
         await ws.close()
         return
-    room, joined_player_id = rooms.join_room(code, player_name, ws, player_id)
+    rejoining = bool(player_id and player_id in rooms.player_ids(code))
+    room, joined_player_id = rooms.join_room(code, player_name, conn, player_id)
     if not room or not joined_player_id:
-        await ws.send_json({"event": "error", "message": "join_failed"})
+        await conn.send_now({"event": "error", "message": "join_failed"})
         await ws.close()
         return
-    await ws.send_json({
-        "event": "joined",
-        "player_id": joined_player_id,
-        "owner_id": room.owner_id,
-        "state": rooms.state_for_room(code),
-    })
-    await _broadcast_room_state(code)
+    _grace_timers.cancel((code, joined_player_id))
+    conn.start(on_close=rooms.leave_connection)
+
+    missed = None
+    if rejoining and resume_token and last_seq is not None and rooms.resume_token_valid(code, joined_player_id, resume_token):
+        missed = _missed_events(code, last_seq, conn.encoding)
+    if missed is not None:
+        conn.send({
+            "event": "resumed",
+            "player_id": joined_player_id,
+            "server_time": time.time(),
+            "seq": _event_log(code).seq,
+        })
+        for kind, frame in missed:
+            conn.push(frame, kind)
+    else:
+        conn.send({
+            "event": "joined",
+            "player_id": joined_player_id,
+            "owner_id": room.owner_id,
+            "server_time": time.time(),
+            "seq": _event_log(code).seq,
+            "resume_token": room.players[joined_player_id].resume_token,
+            "state": rooms.state_for_room(code),
+        })
+        # A returning player doesn't change the room, so only a new one
+        # needs announcing.
+        if not rejoining:
+            _broadcast_room_state(code)
 
     try:
         while True:
-            data = await ws.receive_json()
-            msg_type = data.get("type") or data.get("event")
-            if msg_type == "start_game":
-                r = rooms.get_room(code)
-                is_owner = r and (r.owner_id == owner_id)
-                if not is_owner:
-                    continue
-                if rooms.start_game(code, str(POOL_PATH)):
-                    rooms.start_round(code)
-                    r = rooms.get_room(code)
-                    state = rooms.state_for_room(code)
-                    state["round_ends_at"] = r.round_ends_at
-                    for conn in list(rooms.get_connections(code)):
-                        try:
-                            await conn.send_json({"event": "round_start", "state": state})
-                        except Exception:
-                            rooms.leave_connection(conn)
-                    if code not in _room_timer_tasks:
-                        _room_timer_tasks[code] = asyncio.create_task(_run_round_timer(code))
-            elif msg_type == "submit_answer":
-                answer = data.get("answer", "")
-                rooms.submit_answer(code, joined_player_id, answer)
-                await ws.send_json({"event": "answer_received"})
-                await _broadcast_room_state(code)
+            frame = await ws.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            raw = frame.get("bytes")
+            size = len(raw) if raw is not None else len((frame.get("text") or "").encode("utf-8"))
+            if size > settings.ws_max_message_bytes:
+                await ws.close(code=1009)
+                break
+            data = decode(frame)
+            if data is None:
+                continue
+            _handle_client_message(conn, code, joined_player_id, owner_id, data)
     except Exception:
         pass
     finally:
-        rooms.leave_connection(ws)
-        await _broadcast_room_state(code)
-        
+        conn.stop()
+        rooms.leave_connection(conn)
+        _wake_round_timer(code)
         if joined_player_id:
-            async def delayed_cleanup():
-                await asyncio.sleep(3)
-                rooms.remove_player_if_inactive(code, joined_player_id)
-                await _broadcast_room_state(code)
-            asyncio.create_task(delayed_cleanup())
+            _schedule_player_cleanup(code, joined_player_id, settings.disconnect_grace_seconds)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # ws_max_size makes uvicorn refuse oversized frames before buffering them;
+    # pass --ws-max-size with the same value when launching uvicorn directly.
+    uvicorn.run(app, host="127.0.0.1", port=8000, ws_max_size=settings.ws_max_message_bytes)
@@ -0,0 +1,301 @@
+import argparse
+import gc
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+# Fix module import paths for script execution.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import services.pool as pool_module
+from services.pool import (
+    TitleIndex, _cached_suggest, _scoped_index, get_available_genres, load_pool, score_answer, set_pool,
+    suggest_titles,
+)
+from services.room_manager import RoomManager
+from services.sampling import QUESTION_SAMPLER
+
+# Allowed slowdown of p50 latency versus a baseline report before --compare
+# fails. Scoring and genre lookups are tiny, so timer noise dominates them.
+THRESHOLDS: dict[str, float] = {
+    "title_index_search": 0.25,
+    "suggest_titles": 0.25,
+    "suggest_titles_cached": 0.50,
+    "suggest_titles_scoped": 0.25,
+    "scoped_index_build": 0.30,
+    "start_game": 0.30,
+    "score_answer": 0.50,
+    "get_available_genres": 0.50,
+    "load_pool": 0.30,
+}
+DEFAULT_THRESHOLD = 0.25
+
+
+# ── Synthetic pool ──────────────────────────────────────────────────────────
+
+# Genre frequencies roughly follow the scraped MangaDex pool: a few genres
+# appear on most titles, the long tail on very few.
+GENRE_WEIGHTS = {
+    "Action": 40, "Fantasy": 38, "Romance": 30, "Drama": 28, "Comedy": 22,
+    "Adventure": 18, "Slice of Life": 12, "Isekai": 10, "Martial Arts": 9,
+    "Thriller": 7, "Mystery": 7, "Psychological": 6, "Horror": 4, "Sports": 3,
+    "Sci-Fi": 3, "Historical": 3, "Tragedy": 2, "Medical": 1, "Mecha": 1, "Crime": 1,
+}
+OPENERS = ["The", "Solo", "I Became the", "Return of the", "My", "Reincarnated as the",
+           "Tower of", "Legend of the", "Omniscient", "Second Life of the", "A", "How to"]
+WORDS = ["Leveling", "Hunter", "Villainess", "Duke", "Sword", "God", "Tower", "Reader",
+         "Regressor", "Knight", "Mage", "Empress", "Demon", "Academy", "Beast", "Star",
+         "Shadow", "Blade", "Heir", "Martial", "Emperor", "Saintess", "Necromancer",
+         "Player", "Dungeon", "Princess", "Contract", "Marriage", "Tyrant", "Healer"]
+SUFFIXES = ["", "", "", "Returns", "of the North", "Who Lived Twice", "in Another World",
+            "2", "Chronicles", "Reborn", "and the Dragon", "Season 2"]
+
+
+def _zipf_choice(rng: random.Random, items: list[str], s: float = 1.1) -> str:
+    weights = [1 / (rank + 1) ** s for rank in range(len(items))]
+    return rng.choices(items, weights=weights)[0]
+
+
+def generate_pool(size: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    genres, weights = list(GENRE_WEIGHTS), list(GENRE_WEIGHTS.values())
+    items = []
+    for i in range(size):
+        parts = [rng.choice(OPENERS)] if rng.random() < 0.6 else []
+        parts += [_zipf_choice(rng, WORDS) for _ in range(rng.randint(1, 3))]
+        suffix = rng.choice(SUFFIXES)
+        if suffix:
+            parts.append(suffix)
+        title = " ".join(parts)
+        if rng.random() < 0.3:
+            title = f"{title} {i}"  # keep most titles unique, like the real pool
+        picked = set()
+        for _ in range(rng.choices([1, 2, 3, 4, 5], weights=[10, 30, 30, 20, 10])[0]):
+            picked.add(rng.choices(genres, weights=weights)[0])
+        items.append({
+            "id": f"synthetic-{i:06d}",
+            "title": title,
+            "RAW_NAME": title.lower().replace(" ", "-"),
+            "cover_filename": f"{i:06d}.jpg",
+            "views": int(rng.paretovariate(1.2) * 1000),
+            "rating": round(min(10.0, max(1.0, rng.gauss(7.8, 0.9))), 2),
+            "genres": sorted(picked),
+        })
+    return items
+
+
+# ── Measurement ─────────────────────────────────────────────────────────────
+
+def measure(fn: Callable[[int], object], iterations: int, alloc_iterations: int) -> dict:
+    for i in range(max(1, min(iterations // 10, 50))):  # warm-up
+        fn(i)
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(iterations):
+            start = time.perf_counter_ns()
+            fn(i)
+            samples.append(time.perf_counter_ns() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        blocks_before = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        for i in range(alloc_iterations):
+            fn(i)
+        after, peak = tracemalloc.get_traced_memory()
+        blocks_after = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    total_s = sum(samples) / 1e9
+
+    def pct(p: float) -> float:
+        return samples[min(len(samples) - 1, int(p * len(samples)))] / 1000
+
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations / total_s if total_s else 0.0,
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p50_us": pct(0.50),
+        "p90_us": pct(0.90),
+        "p99_us": pct(0.99),
+        "max_us": samples[-1] / 1000,
+        "peak_alloc_bytes": peak - before,
+        "retained_bytes_per_call": (after - before) / max(alloc_iterations, 1),
+        "retained_blocks_per_call": (blocks_after - blocks_before) / max(alloc_iterations, 1),
+    }
+
+
+def _queries(items: list[dict], count: int, rng: random.Random) -> list[str]:
+    queries = []
+    for _ in range(count):
+        title = rng.choice(items)["title"].lower()
+        if rng.random() < 0.7:
+            queries.append(title[: rng.randint(1, min(8, len(title)))])  # typing a prefix
+        else:
+            start = rng.randint(0, max(0, len(title) - 4))
+            queries.append(title[start:start + rng.randint(3, 6)])  # remembered a word
+    return queries
+
+
+def bench_size(size: int, args) -> dict:
+    rng = random.Random(args.seed)
+    items = generate_pool(size, seed=args.seed)
+    iterations = args.iterations
+    alloc_iterations = max(1, iterations // 10)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "pool.json"
+        path.write_text(json.dumps(items), encoding="utf-8")
+
+        def run_load(_: int):
+            set_pool([])
+            load_pool(str(path))
+
+        load_iterations = max(3, iterations // 200)
+        results["load_pool"] = measure(run_load, load_iterations, max(1, load_iterations // 3))
+
+    set_pool(items)
+    index = TitleIndex(items)
+    queries = _queries(items, 1000, rng)
+    results["title_index_search"] = measure(
+        lambda i: index.search(queries[i % len(queries)], 10), iterations, alloc_iterations
+    )
+
+    def run_suggest(i: int):
+        # Clear the result cache so the index search is what gets timed.
+        _cached_suggest.cache_clear()
+        suggest_titles(queries[i % len(queries)], 10)
+
+    results["suggest_titles"] = measure(run_suggest, iterations, alloc_iterations)
+    results["suggest_titles_cached"] = measure(
+        lambda i: suggest_titles(queries[i % len(queries)], 10), iterations, alloc_iterations
+    )
+
+    scopes = [
+        QUESTION_SAMPLER.key("views", "easy"),
+        QUESTION_SAMPLER.key("rating", "medium"),
+        QUESTION_SAMPLER.key("views", "hard", ["Action", "Fantasy"]),
+    ]
+    results["suggest_titles_scoped"] = measure(
+        lambda i: _scoped_index(scopes[i % len(scopes)]).search(queries[i % len(queries)], 10),
+        iterations, alloc_iterations,
+    )
+
+    def run_scoped_build(i: int):
+        # Candidate sets stay cached in the sampler; only the index is rebuilt.
+        pool_module._SCOPED_INDEXES.clear()
+        pool_module._scoped_bytes = 0
+        _scoped_index(scopes[i % len(scopes)])
+
+    build_iterations = max(10, iterations // 20)
+    results["scoped_index_build"] = measure(run_scoped_build, build_iterations, max(1, build_iterations // 10))
+
+    answers = [(rng.choice(items)["title"], rng.choice(items)["title"]) for _ in range(1000)]
+    results["score_answer"] = measure(
+        lambda i: score_answer(*answers[i % len(answers)], 100, 50), iterations, alloc_iterations
+    )
+    results["get_available_genres"] = measure(lambda i: get_available_genres(), iterations, alloc_iterations)
+
+    manager = RoomManager()
+    configs = [
+        {"difficulty": "easy", "sort_by": "views"},
+        {"difficulty": "medium", "sort_by": "rating"},
+        {"difficulty": "hard", "sort_by": "views"},
+        {"difficulty": "hard", "sort_by": "rating", "genres": ["Action", "Fantasy"]},
+        {"difficulty": "custom", "sort_by": "views", "pool_size": 500},
+    ]
+    codes = []
+    for i in range(iterations + 50):
+        code, _ = manager.create_room(rounds_total=10, **configs[i % len(configs)])
+        codes.append(code)
+    code_iter = iter(codes)
+
+    def run_start(_: int):
+        code = next(code_iter, None)
+        if code is None:
+            code, _ = manager.create_room(rounds_total=10)
+        manager.start_game(code, "")
+
+    start_iterations = max(10, iterations // 20)
+    results["start_game"] = measure(run_start, start_iterations, max(1, start_iterations // 10))
+    return results
+
+
+# ── Regression check ────────────────────────────────────────────────────────
+
+def compare(report: dict, baseline: dict, default_threshold: float) -> list[str]:
+    failures = []
+    for size, cases in report["results"].items():
+        for name, stats in cases.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base or not base.get("p50_us"):
+                continue
+            allowed = THRESHOLDS.get(name, default_threshold)
+            change = stats["p50_us"] / base["p50_us"] - 1
+            line = f"{size:>7} {name:<22} p50 {base['p50_us']:10.2f}us -> {stats['p50_us']:10.2f}us ({change:+.0%}, limit +{allowed:.0%})"
+            print(line)
+            if change > allowed:
+                failures.append(line)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for pool, index and scoring hot paths")
+    parser.add_argument("--sizes", type=str, default="1000,10000", help="Comma-separated synthetic pool sizes")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report here")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline report to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed p50 slowdown for cases without their own threshold")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "sizes": sizes,
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        print(f"Benchmarking synthetic pool of {size} titles...")
+        report["results"][str(size)] = bench_size(size, args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        print(f"Wrote report to {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        failures = compare(report, baseline, args.max_regression)
+        if failures:
+            print(f"{len(failures)} regression(s) over threshold")
+            sys.exit(1)
+        print("No regressions over threshold")
+
+
+if __name__ == "__main__":
+    main()
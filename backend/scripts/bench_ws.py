@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlparse
+
+import httpx
+import websockets
+
+# Fix module import paths for script execution.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.protocol import EVENT_NAMES, MSGPACK
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+# ── Measurements ────────────────────────────────────────────────────────────
+
+class Recorder:
+    def __init__(self):
+        self.answer_rtt: list[float] = []
+        self.round_start_latency: list[float] = []
+        self.round_start_spread: list[float] = []
+        self.round_end_lateness: list[float] = []
+        self.tick_jitter: list[float] = []
+        self.messages = 0
+        self.bytes = 0
+        self.errors: list[str] = []
+        # (room_code, round_index) -> arrival times of round_start across players
+        self._round_arrivals: dict[tuple[str, int], list[float]] = {}
+
+    def round_start(self, room_code: str, state: dict, now: float):
+        started_at = state["round_ends_at"] - state["seconds_per_round"]
+        self.round_start_latency.append(now - started_at)
+        self._round_arrivals.setdefault((room_code, state["round_index"]), []).append(now)
+
+    def finish(self):
+        for arrivals in self._round_arrivals.values():
+            if len(arrivals) > 1:
+                self.round_start_spread.append(max(arrivals) - min(arrivals))
+
+
+def summarize(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p99_ms": pct(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+class ProcessSampler:
+    """Samples CPU time and RSS of the server process from /proc (Linux)."""
+
+    def __init__(self, pid: int | None, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.rss_peak_kb = 0
+        self.rss_samples: list[int] = []
+        self._cpu_start = 0.0
+        self._wall_start = 0.0
+        self._task: asyncio.Task | None = None
+
+    def _cpu_seconds(self) -> float:
+        fields = Path(f"/proc/{self.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        return (int(fields[11]) + int(fields[12])) / ticks  # utime + stime
+
+    def _rss_kb(self) -> int:
+        for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+        return 0
+
+    async def _run(self):
+        while True:
+            rss = self._rss_kb()
+            self.rss_samples.append(rss)
+            self.rss_peak_kb = max(self.rss_peak_kb, rss)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if not self.pid:
+            return
+        self._cpu_start = self._cpu_seconds()
+        self._wall_start = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> dict:
+        if not self.pid:
+            return {}
+        if self._task:
+            self._task.cancel()
+        cpu = self._cpu_seconds() - self._cpu_start
+        wall = time.perf_counter() - self._wall_start
+        return {
+            "pid": self.pid,
+            "cpu_seconds": cpu,
+            "cpu_utilization": cpu / wall if wall > 0 else 0.0,
+            "rss_start_kb": self.rss_samples[0] if self.rss_samples else 0,
+            "rss_end_kb": self._rss_kb(),
+            "rss_peak_kb": self.rss_peak_kb,
+        }
+
+
+# ── Simulated players ───────────────────────────────────────────────────────
+
+class JoinGate:
+    """Holds players until the whole room has joined (asyncio.Barrier is 3.11+)."""
+
+    def __init__(self, parties: int):
+        self._remaining = parties
+        self._event = asyncio.Event()
+
+    async def arrive(self):
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self._event.set()
+        await self._event.wait()
+
+
+def decode(raw: str | bytes) -> dict:
+    if isinstance(raw, bytes):
+        import msgpack
+
+        msg = msgpack.unpackb(raw, raw=False)
+        msg["event"] = EVENT_NAMES.get(msg.pop("e", None), "unknown")
+        return msg
+    return json.loads(raw)
+
+
+async def run_player(
+    args,
+    rec: Recorder,
+    room_code: str,
+    index: int,
+    owner_id: str | None,
+    all_joined: JoinGate,
+):
+    params = {
+        "room_code": room_code,
+        "player_name": f"bench{index}",
+        "player_id": f"bench_{room_code}_{index:04d}",
+    }
+    if owner_id:
+        params["owner_id"] = owner_id
+    if args.encoding != "json":
+        params["encoding"] = args.encoding
+    url = f"{args.ws_url}/ws?{urlencode(params)}"
+
+    pending_answers: list[float] = []
+    last_tick: float | None = None
+    round_ends_at = 0.0
+
+    async def answer_after_think(state: dict):
+        await asyncio.sleep(random.uniform(args.think_min, args.think_max))
+        q = state.get("current_question") or {}
+        answer = q.get("title", "") if random.random() < args.correct_rate else "wrong answer"
+        try:
+            if args.suggest:
+                for n in range(1, min(len(answer), 4) + 1):
+                    await ws.send(json.dumps({"type": "suggest", "id": n, "q": answer[:n]}))
+            pending_answers.append(time.perf_counter())
+            await ws.send(json.dumps({"type": "submit_answer", "answer": answer}))
+        except websockets.ConnectionClosed:
+            pass  # the game ended while this player was still "thinking"
+
+    async with websockets.connect(url, max_size=None) as ws:
+        first = decode(await ws.recv())
+        if first.get("event") != "joined":
+            rec.errors.append(f"{room_code}/{index}: {first}")
+            return
+        await all_joined.arrive()
+        if owner_id:
+            await ws.send(json.dumps({"type": "start_game"}))
+
+        async for raw in ws:
+            now = time.perf_counter()
+            wall = time.time()
+            rec.messages += 1
+            rec.bytes += len(raw)
+            msg = decode(raw)
+            event = msg.get("event")
+            if event == "round_start":
+                state = msg["state"]
+                round_ends_at = state["round_ends_at"]
+                last_tick = None
+                rec.round_start(room_code, state, wall)
+                asyncio.create_task(answer_after_think(state))
+            elif event == "answer_received" and pending_answers:
+                rec.answer_rtt.append(now - pending_answers.pop(0))
+            elif event == "tick":
+                if last_tick is not None:
+                    rec.tick_jitter.append(abs((now - last_tick) - 1.0))
+                last_tick = now
+            elif event == "round_end":
+                pending_answers.clear()
+                if wall >= round_ends_at:
+                    rec.round_end_lateness.append(wall - round_ends_at)
+            elif event == "game_over":
+                return
+
+
+async def run_room(args, rec: Recorder, client: httpx.AsyncClient):
+    r = await client.post(
+        f"{args.base_url}/api/rooms",
+        headers={"X-API-Key": args.api_key},
+        json={
+            "rounds_total": args.rounds,
+            "seconds_per_round": args.seconds_per_round,
+            "max_players": args.players,
+            "difficulty": "hard",
+        },
+    )
+    r.raise_for_status()
+    data = r.json()
+    if data.get("error"):
+        rec.errors.append(data["error"])
+        return
+    barrier = JoinGate(args.players)
+    await asyncio.gather(*(
+        run_player(args, rec, data["room_code"], i, data["owner_id"] if i == 0 else None, barrier)
+        for i in range(args.players)
+    ))
+
+
+async def run(args) -> dict:
+    rec = Recorder()
+    sampler = ProcessSampler(args.server_pid)
+    client_usage = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    sampler.start()
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one_room():
+            async with sem:
+                await asyncio.sleep(random.uniform(0, args.ramp))
+            await run_room(args, rec, client)
+
+        results = await asyncio.gather(*(one_room() for _ in range(args.rooms)), return_exceptions=True)
+    rec.errors.extend(repr(e) for e in results if isinstance(e, BaseException))
+    elapsed = time.perf_counter() - started
+    server = sampler.stop()
+    rec.finish()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "config": {k: v for k, v in vars(args).items() if k not in ("api_key", "output")},
+            "elapsed_seconds": elapsed,
+        },
+        "messages_received": rec.messages,
+        "bytes_received": rec.bytes,
+        "answer_to_ack": summarize(rec.answer_rtt),
+        "round_start_latency": summarize(rec.round_start_latency),
+        "round_start_fanout_spread": summarize(rec.round_start_spread),
+        "round_end_lateness": summarize(rec.round_end_lateness),
+        "tick_jitter": summarize(rec.tick_jitter),
+        "server": server,
+        "client": {
+            "cpu_seconds": (usage.ru_utime + usage.ru_stime) - (client_usage.ru_utime + client_usage.ru_stime),
+            "max_rss_kb": usage.ru_maxrss,
+        },
+        "errors": rec.errors[:50],
+        "error_count": len(rec.errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the room WebSocket game loop against a local server")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-key", default=os.environ.get("API_SECRET_KEY", "secret"))
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--players", type=int, default=4, help="Simulated players per room (2-20)")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seconds-per-round", type=int, default=10)
+    parser.add_argument("--think-min", type=float, default=1.0, help="Min seconds before answering")
+    parser.add_argument("--think-max", type=float, default=5.0, help="Max seconds before answering")
+    parser.add_argument("--correct-rate", type=float, default=0.5)
+    parser.add_argument("--encoding", choices=["json", MSGPACK], default="json")
+    parser.add_argument("--suggest", action="store_true", help="Also send suggest messages before each answer")
+    parser.add_argument("--concurrency", type=int, default=50, help="Rooms being set up at once")
+    parser.add_argument("--ramp", type=float, default=1.0, help="Spread room start over this many seconds")
+    parser.add_argument("--server-pid", type=int, default=None, help="Server PID to sample CPU/RSS from /proc")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    host = urlparse(args.base_url).hostname
+    if host not in LOCAL_HOSTS:
+        parser.error(f"refusing to load-test non-local host {host!r}")
+    if not 2 <= args.players <= 20:
+        parser.error("--players must be between 2 and 20")
+    args.ws_url = args.base_url.replace("http", "ws", 1)
+    random.seed(args.seed)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        print(f"Wrote report to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
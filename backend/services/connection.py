@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable
+
+from services import metrics, tracing
+from services.protocol import JSON, encode
+
+# Frames of these kinds are full snapshots or cosmetic; a newer one makes any
+# older one still waiting in the queue redundant.
+MERGEABLE_KINDS = frozenset({"room_state", "tick"})
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def allow(self, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class ClientConnection:
+    """A room socket plus its negotiated encoding, inbound rate limit and a
+    bounded outbound queue drained by a single writer task."""
+
+    def __init__(
+        self,
+        ws: Any,
+        encoding: str = JSON,
+        max_queue: int = 32,
+        rate: float = 5.0,
+        burst: float = 10.0,
+        suggest_rate: float = 20.0,
+        suggest_burst: float = 20.0,
+        room_code: str | None = None,
+    ):
+        self.ws = ws
+        self.room_code = room_code
+        self.encoding = encoding
+        self.bucket = TokenBucket(rate, burst)
+        self.suggest_bucket = TokenBucket(suggest_rate, suggest_burst)
+        self.closed = False
+        self._max_queue = max_queue
+        self._queue: deque[list] = deque()  # [kind, frame]
+        self._ready = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+        self._on_close: Callable[["ClientConnection"], None] | None = None
+
+    def start(self, on_close: Callable[["ClientConnection"], None] | None = None) -> None:
+        self._on_close = on_close
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._drain())
+
+    async def send_now(self, message: dict) -> None:
+        frame = encode(message, self.encoding)
+        if isinstance(frame, bytes):
+            await self.ws.send_bytes(frame)
+        else:
+            await self.ws.send_text(frame)
+
+    def send(self, message: dict) -> bool:
+        return self.push(encode(message, self.encoding), message.get("event"))
+
+    def push(self, frame: str | bytes, kind: str | None = None) -> bool:
+        if self.closed:
+            return False
+        if kind in MERGEABLE_KINDS:
+            for entry in self._queue:
+                if entry[0] == kind:
+                    # Drop the stale frame and queue the new one at the tail,
+                    # so it can't overtake frames queued after the old one.
+                    self._queue.remove(entry)
+                    metrics.WS_FRAMES_DROPPED.labels("merged").inc()
+                    break
+        if len(self._queue) >= self._max_queue and not self._drop_stale():
+            # The client cannot keep up even after shedding stale frames.
+            metrics.WS_FRAMES_DROPPED.labels("overflow").inc(len(self._queue) + 1)
+            self._fail()
+            return False
+        self._queue.append([kind, frame])
+        self._ready.set()
+        return True
+
+    def _drop_stale(self) -> bool:
+        for entry in self._queue:
+            if entry[0] in MERGEABLE_KINDS:
+                self._queue.remove(entry)
+                metrics.WS_FRAMES_DROPPED.labels("shed").inc()
+                return True
+        return False
+
+    async def _drain(self) -> None:
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                kind, frame = self._queue.popleft()
+                with tracing.span(f"send.{kind}", self.room_code):
+                    if isinstance(frame, bytes):
+                        await self.ws.send_bytes(frame)
+                    else:
+                        await self.ws.send_text(frame)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self._fail()
+
+    def _fail(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        if self._on_close:
+            self._on_close(self)
+        asyncio.get_running_loop().create_task(self._close_socket())
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.ws.close(code=1013)
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
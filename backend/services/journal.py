@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+_SNAPSHOT = "__snapshot__"
+_STOP = "__stop__"
+
+logger = logging.getLogger(__name__)
+
+
+class RoomJournal:
+    """Write-behind log of room events.
+
+    `append()` only puts a tuple on a queue, so the game loop never touches
+    the disk. A writer thread drains the queue in batches, writes one JSON line
+    per event and fsyncs once per batch (group commit). Snapshots replace the
+    log with the full room state so replay stays short.
+
+    Each line is `[seq, ts, kind, room_code, data]`. The snapshot records the
+    last seq it covers, so events that survive a crash between writing the
+    snapshot and truncating the log are skipped on replay.
+    """
+
+    def __init__(self, path: str | Path, commit_interval: float = 0.05, max_batch: int = 1024):
+        self.path = Path(path)
+        self.snapshot_path = self.path.with_name(self.path.name + ".snapshot")
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._seq = 0
+        # Set when the writer thread gives up; appends are dropped from then on.
+        self.failed = False
+
+    def backlog(self) -> int:
+        return self._queue.qsize()
+
+    # ── Event loop side ─────────────────────────────────────────────────────
+
+    def append(self, kind: str, room_code: str, data: Any = None) -> None:
+        # `data` must not be mutated afterwards; callers pass fresh values.
+        if not self.failed:
+            self._queue.put((time.time(), kind, room_code, data))
+
+    def snapshot(self, rooms: dict) -> None:
+        if not self.failed:
+            self._queue.put((time.time(), _SNAPSHOT, None, rooms))
+
+    def read(self) -> tuple[dict, list[tuple[str, str, Any]]]:
+        """Return (rooms snapshot, events logged after it) and remember the
+        last seq so new lines continue from it."""
+        snapshot, covered = {}, 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                payload = json.load(f)
+            snapshot, covered = payload.get("rooms", {}), payload.get("seq", 0)
+        self._seq = covered
+
+        events = []
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        seq, _, kind, code, data = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash or a failed batch
+                    self._seq = max(self._seq, seq)
+                    if seq > covered:
+                        events.append((kind, code, data))
+        return snapshot, events
+
+    def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="room-journal", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            self._queue.put((time.time(), _STOP, None, None))
+        self._thread.join()
+        self._thread = None
+
+    # ── Writer thread ───────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        f = None
+        try:
+            f = open(self.path, "ab")
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                started = time.monotonic()
+                try:
+                    f, stop = self._write_batch(f, batch)
+                except Exception:
+                    # The batch is lost, but later events may still land.
+                    logger.exception("Room journal write failed; dropped %d events", len(batch))
+                    f.close()
+                    f = open(self.path, "ab")
+                    stop = any(item[1] == _STOP for item in batch)
+                if stop:
+                    return
+
+                # Let the next batch accumulate instead of fsyncing per event.
+                elapsed = time.monotonic() - started
+                if elapsed < self.commit_interval:
+                    time.sleep(self.commit_interval - elapsed)
+        except Exception:
+            logger.exception("Room journal writer stopped; journaling is disabled")
+            self.failed = True
+            while True:  # release what was queued before `failed` was seen
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+        finally:
+            if f is not None:
+                f.close()
+
+    def _write_batch(self, f, batch: list[tuple]) -> tuple[Any, bool]:
+        lines = []
+        for ts, kind, code, data in batch:
+            if kind == _SNAPSHOT:
+                self._commit(f, lines)
+                lines = []
+                f = self._write_snapshot(f, data)
+            elif kind == _STOP:
+                self._commit(f, lines)
+                return f, True
+            else:
+                self._seq += 1
+                lines.append(json.dumps([self._seq, ts, kind, code, data], separators=(",", ":")))
+        self._commit(f, lines)
+        return f, False
+
+    def _commit(self, f, lines: list[str]) -> None:
+        if not lines:
+            return
+        f.write(("\n".join(lines) + "\n").encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _write_snapshot(self, f, rooms: dict):
+        tmp = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with open(tmp, "wb") as out:
+            out.write(json.dumps({"seq": self._seq, "rooms": rooms}, separators=(",", ":")).encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self.snapshot_path)
+        f.close()
+        return open(self.path, "wb")  # everything so far is in the snapshot
@@ -0,0 +1,220 @@
+import math
+from bisect import bisect_left
+from typing import Callable
+
+# Metrics are only updated from the event loop thread, so plain attribute
+# arithmetic is safe and costs a few hundred nanoseconds per update.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        if not labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: tuple[str, ...], child) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.value += amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self._default.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.value -= amount
+
+
+class CallbackGauge(_Metric):
+    """A gauge computed at scrape time: `fn` returns {label_values: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...], fn: Callable[[], dict]):
+        self._fn = fn
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _Value()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in self._fn().items():
+            values = values if isinstance(values, tuple) else (values,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _render_child(self, values: tuple[str, ...], child: _HistogramChild) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*child.bounds, math.inf), child.counts):
+            cumulative += count
+            le = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+
+def callback_gauge(name: str, help: str, labelnames: tuple[str, ...], fn: Callable[[], dict]) -> CallbackGauge:
+    return REGISTRY.register(CallbackGauge(name, help, labelnames, fn))
+
+
+def histogram(name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+# ── Application metrics ─────────────────────────────────────────────────────
+
+EVENT_LOOP_LAG = histogram("manhwa_event_loop_lag_seconds", "Delay between a scheduled wake-up and when the loop ran it")
+BROADCAST_DURATION = histogram(
+    "manhwa_broadcast_duration_seconds", "Time to encode and enqueue one room broadcast", ("event",)
+)
+BROADCAST_BYTES = histogram(
+    "manhwa_broadcast_frame_bytes", "Encoded frame size per room broadcast", ("event",), SIZE_BUCKETS
+)
+BROADCAST_RECIPIENTS = counter("manhwa_broadcast_frames_total", "Frames enqueued to sockets by broadcasts", ("event",))
+WS_FRAMES_DROPPED = counter(
+    "manhwa_ws_frames_dropped_total", "Outbound frames merged, shed or lost to a slow-client disconnect", ("reason",)
+)
+WS_MESSAGES_THROTTLED = counter("manhwa_ws_messages_throttled_total", "Inbound messages over the rate limit", ("type",))
+ROUND_TIMER_LATENESS = histogram(
+    "manhwa_round_timer_lateness_seconds", "How late a timed-out round ended relative to round_ends_at"
+)
+SUGGEST_LATENCY = histogram("manhwa_suggest_latency_seconds", "Suggestion lookup latency", ("transport",))
+COVER_UPSTREAM_LATENCY = histogram("manhwa_cover_upstream_latency_seconds", "Cover fetch latency from MangaDex")
+COVER_BYTES = counter("manhwa_cover_bytes_total", "Cover bytes served", ("source",))
+COVER_REQUESTS = counter("manhwa_cover_requests_total", "Cover proxy requests", ("result",))
+POOL_LOAD_SECONDS = gauge("manhwa_pool_load_seconds", "Time taken to load and index the pool at startup")
+POOL_TITLES = gauge("manhwa_pool_titles", "Titles in the loaded pool")
@@ -1,33 +1,42 @@
 import json
-import random
+import sys
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 
+from config import settings
+from services.sampling import QUESTION_SAMPLER
+
 # ── Search Index for fast auto-suggestions ────────────────────────────────
 
 class TitleIndex:
     def __init__(self, pool: list[dict]):
         self._titles: list[str] = []
+        self._lowered: list[str] = []
         seen = set()
         for item in pool:
             title = (item.get("title") or "").strip()
             if title and title not in seen:
                 seen.add(title)
                 self._titles.append(title)
+                self._lowered.append(title.lower())
+        # Rough footprint for cache budgeting: the lowered copies plus both lists.
+        self.nbytes = sum(map(sys.getsizeof, self._lowered)) + 2 * sys.getsizeof(self._titles)
 
     def search(self, prefix: str, limit: int = 10) -> list[str]:
         q = prefix.lower()
         results = []
         
         # Prioritize exact prefix matches first
-        for title in self._titles:
-            if title.lower().startswith(q):
+        for title, lowered in zip(self._titles, self._lowered):
+            if lowered.startswith(q):
                 results.append(title)
                 if len(results) >= limit:
                     return results
                     
         # Then fill with partial matches
-        for title in self._titles:
-            if title not in results and q in title.lower():
+        for title, lowered in zip(self._titles, self._lowered):
+            if q in lowered and not lowered.startswith(q):
                 results.append(title)
                 if len(results) >= limit:
                     return results
@@ -37,12 +46,16 @@ class TitleIndex:
 # ── Global state ────────────────────────────────────────────────────────────
 
 _POOL: list[dict] = []
+_GENRES: list[str] = []
 TITLE_INDEX: TitleIndex | None = None
+# Indexes over a room configuration's candidate set, keyed by
+# QUESTION_SAMPLER.key() and shared by every room with that configuration.
+_SCOPED_INDEXES: OrderedDict[tuple, TitleIndex] = OrderedDict()
+_scoped_bytes = 0
 
 # ── Core functions ──────────────────────────────────────────────────────────
 
 def load_pool(pool_path: str) -> list[dict]:
-    global _POOL, TITLE_INDEX
     if _POOL:
         return _POOL
     path = Path(pool_path)
@@ -50,8 +63,19 @@ def load_pool(pool_path: str) -> list[dict]:
         return []
     with open(path, encoding="utf-8") as f:
         data = json.load(f)
-    _POOL = data if isinstance(data, list) else data.get("items", [])
+    return set_pool(data if isinstance(data, list) else data.get("items", []))
+
+
+def set_pool(items: list[dict]) -> list[dict]:
+    """Install `items` as the in-memory pool and rebuild everything derived from it."""
+    global _POOL, _GENRES, TITLE_INDEX, _scoped_bytes
+    _POOL = items
     TITLE_INDEX = TitleIndex(_POOL)
+    _GENRES = sorted({g for item in _POOL for g in item.get("genres", []) if g})
+    _SCOPED_INDEXES.clear()
+    _scoped_bytes = 0
+    _cached_suggest.cache_clear()
+    QUESTION_SAMPLER.rebuild(_POOL)
     return _POOL
 
 
@@ -62,17 +86,37 @@ def save_pool(pool_path: str, items: list[dict], meta: dict | None = None) -> No
     p.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
-def pick_questions(pool: list[dict], count: int) -> list[dict]:
-    if len(pool) < count:
-        count = len(pool)
-    return random.sample(pool, count)
-
-
-def suggest_titles(q: str, limit: int = 10) -> list[str]:
-    q = (q or "").strip()
+def suggest_titles(q: str, limit: int = 10, scope: tuple | None = None) -> list[str]:
+    """Search the whole pool, or only a room configuration's candidates when
+    `scope` is a QUESTION_SAMPLER.key()."""
+    q = (q or "").strip().lower()
     if not q or not TITLE_INDEX:
         return []
-    return TITLE_INDEX.search(q, limit)
+    return list(_cached_suggest(q, limit, scope))
+
+
+@lru_cache(maxsize=4096)
+def _cached_suggest(q: str, limit: int, scope: tuple | None) -> tuple[str, ...]:
+    # Hot prefixes ("s", "so", "sol", ...) repeat across every player.
+    index = TITLE_INDEX if scope is None else _scoped_index(scope)
+    return tuple(index.search(q, limit))
+
+
+def _scoped_index(scope: tuple) -> TitleIndex:
+    global _scoped_bytes
+    index = _SCOPED_INDEXES.get(scope)
+    if index is not None:
+        _SCOPED_INDEXES.move_to_end(scope)
+        return index
+    candidates = QUESTION_SAMPLER.candidates(*scope)
+    if len(candidates) >= len(_POOL):
+        return TITLE_INDEX
+    index = _SCOPED_INDEXES[scope] = TitleIndex(candidates.items)
+    _scoped_bytes += index.nbytes
+    while _scoped_bytes > settings.suggest_index_cache_bytes and len(_SCOPED_INDEXES) > 1:
+        _, evicted = _SCOPED_INDEXES.popitem(last=False)
+        _scoped_bytes -= evicted.nbytes
+    return index
 
 
 def normalize_title(s: str) -> str:
@@ -92,11 +136,5 @@ def score_answer(submitted: str, correct_title: str, points_exact: int, points_f
     return 0
 
 def get_available_genres() -> list[str]:
-    if not _POOL:
-        return []
-    all_genres = set()
-    for item in _POOL:
-        for g in item.get("genres", []):
-            if g:
-                all_genres.add(g)
-    return sorted(list(all_genres))
+    # Computed once in load_pool.
+    return list(_GENRES)
@@ -0,0 +1,49 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack from a helper thread and aggregates
+    the result as folded stacks (`frame;frame;frame count`), the input format
+    of flamegraph.pl, speedscope and inferno."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+
+    def _sample(self, thread_id: int, seconds: float, interval: float) -> tuple[Counter, int]:
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stacks[";".join(reversed(names))] += 1
+                samples += 1
+            time.sleep(interval)
+        return stacks, samples
+
+    async def profile(self, seconds: float, interval: float) -> tuple[str, int]:
+        """Profile the calling (event loop) thread; returns (folded stacks, samples)."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("profiler_busy")
+        self.running = True
+        try:
+            thread_id = threading.get_ident()
+            stacks, samples = await asyncio.to_thread(self._sample, thread_id, seconds, interval)
+        finally:
+            self.running = False
+            self._lock.release()
+        folded = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+        return folded + "\n", samples
+
+
+PROFILER = SamplingProfiler()
@@ -0,0 +1,53 @@
+import json
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; JSON is always available
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Compact event codes used by the binary encoding. Append-only: the frontend
+# keeps the same table in `lib/protocol.ts`.
+EVENT_CODES: dict[str, int] = {
+    "joined": 1,
+    "room_state": 2,
+    "round_start": 3,
+    "tick": 4,
+    "answer_received": 5,
+    "round_end": 6,
+    "game_over": 7,
+    "error": 8,
+    "suggestions": 9,
+    "resumed": 10,
+}
+EVENT_NAMES: dict[int, str] = {v: k for k, v in EVENT_CODES.items()}
+
+
+def negotiate_encoding(requested: str | None) -> str:
+    if (requested or "").lower() == MSGPACK and msgpack is not None:
+        return MSGPACK
+    return JSON
+
+
+def encode(message: dict[str, Any], encoding: str) -> str | bytes:
+    if encoding == MSGPACK:
+        event = message.get("event")
+        compact = {k: v for k, v in message.items() if k != "event"}
+        compact["e"] = EVENT_CODES.get(event, event)
+        return msgpack.packb(compact, use_bin_type=True)
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode(frame: dict[str, Any]) -> dict[str, Any] | None:
+    """Decode a raw ASGI `websocket.receive` message into a client payload."""
+    raw_bytes = frame.get("bytes")
+    if raw_bytes is not None:
+        if msgpack is None:
+            return None
+        data = msgpack.unpackb(raw_bytes, raw=False)
+    else:
+        data = json.loads(frame.get("text") or "null")
+    return data if isinstance(data, dict) else None
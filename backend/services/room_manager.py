@@ -1,12 +1,15 @@
+import json
 import secrets
 import time
 import random
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from typing import Any
 
 from config import settings
-from services.pool import load_pool, pick_questions, score_answer
+from services.pool import load_pool, score_answer
+from services.sampling import QUESTION_SAMPLER
+from services.tracing import traced
 
 
 def gen_room_code() -> str:
@@ -18,6 +21,8 @@ class Player:
     id: str
     name: str
     score: int = 0
+    # Lets a reconnecting socket resume from its last seen event.
+    resume_token: str = field(default_factory=lambda: secrets.token_hex(8))
 
 
 @dataclass
@@ -32,7 +37,12 @@ class RoomState:
     current_question: dict | None = None
     round_ends_at: float = 0
     answers: dict[str, str] = field(default_factory=dict)
+    # Players whose latest answer was throttled and not journaled yet.
+    pending_answers: set[str] = field(default_factory=set)
     results: list[dict] = field(default_factory=list)
+    # Each round result encoded once when it ends, for paged history reads.
+    result_frames: list[bytes] = field(default_factory=list)
+    game_number: int = 0
     seconds_per_round: int = 20
     points_exact: int = 100
     points_fuzzy: int = 50
@@ -42,6 +52,15 @@ class RoomState:
     genres: list[str] | None = None
     sort_by: str = "views"
     pool_size: int | None = None
+    # Question ids from earlier games, so rematches avoid repeating covers.
+    recent_question_ids: deque = field(default_factory=lambda: deque(maxlen=settings.recent_questions_per_room))
+
+
+# Creation-time settings, journaled with `create` and kept in snapshots.
+ROOM_SETTINGS = (
+    "rounds_total", "seconds_per_round", "max_players", "suggestions_enabled",
+    "difficulty", "genres", "sort_by", "pool_size",
+)
 
 
 class RoomManager:
@@ -52,7 +71,13 @@ class RoomManager:
         self._ws_to_player: dict[int, tuple[str, str]] = {}  # ws_id -> (room_code, player_id)
         self._player_to_ws: dict[str, int] = {}  # player_id -> ws_id
         self._wid_to_ws: dict[int, Any] = {}  # ws_id -> ws (for reattach cleanup)
+        self.journal = None  # RoomJournal when crash recovery is enabled
 
+    def _record(self, kind: str, code: str, data: Any = None) -> None:
+        if self.journal is not None:
+            self.journal.append(kind, code, data)
+
+    @traced()
     def create_room(
         self,
         room_code: str | None = None,
@@ -90,6 +115,9 @@ class RoomManager:
             sort_by=sort_by or "views",
             pool_size=pool_size,
         )
+        if self.journal is not None:
+            room = self._rooms[code]
+            self._record("create", code, {f: getattr(room, f) for f in ("owner_id", *ROOM_SETTINGS)})
         return code, owner_id
 
     def room_exists(self, room_code: str) -> bool:
@@ -98,6 +126,7 @@ class RoomManager:
     def get_room(self, room_code: str) -> RoomState | None:
         return self._rooms.get((room_code or "").upper())
 
+    @traced()
     def join_room(self, room_code: str, player_name: str, ws: Any, player_id: str | None = None) -> tuple[RoomState | None, str | None]:
         code = (room_code or "").upper()
         room = self._rooms.get(code)
@@ -132,6 +161,7 @@ class RoomManager:
                 pid = secrets.token_hex(8)
 
         room.players[pid] = Player(id=pid, name=(player_name or "Player").strip() or "Player")
+        self._record("join", code, (pid, room.players[pid].name))
         self._connections[code].add(ws)
         self._wid_to_ws[wid] = ws
         self._player_room[wid] = code
@@ -139,6 +169,7 @@ class RoomManager:
         self._player_to_ws[pid] = wid
         return room, pid
 
+    @traced()
     def leave_connection(self, ws: Any) -> None:
         wid = id(ws)
         self._wid_to_ws.pop(wid, None)
@@ -159,63 +190,90 @@ class RoomManager:
     def is_player_active(self, player_id: str) -> bool:
         return player_id in self._player_to_ws
 
-    def remove_player_if_inactive(self, room_code: str, player_id: str):
-        if not self.is_player_active(player_id):
-            code = (room_code or "").upper()
-            room = self._rooms.get(code)
-            if room:
-                room.players.pop(player_id, None)
-                if not room.players:
-                    self._rooms.pop(code, None)
+    @traced()
+    def remove_player_if_inactive(self, room_code: str, player_id: str) -> bool:
+        if self.is_player_active(player_id):
+            return False
+        code = (room_code or "").upper()
+        room = self._rooms.get(code)
+        if not room or not room.players.pop(player_id, None):
+            return False
+        self._record("leave", code, player_id)
+        if not room.players:
+            self._rooms.pop(code, None)
+        return True
+
+    def resume_token_valid(self, room_code: str, player_id: str, token: str) -> bool:
+        room = self.get_room(room_code)
+        player = room.players.get(player_id) if room else None
+        return bool(player and token and secrets.compare_digest(player.resume_token, token))
 
     def get_connections(self, room_code: str) -> set:
         return self._connections.get((room_code or "").upper(), set())
 
+    def stats_by_phase(self) -> dict[str, tuple[int, int]]:
+        # phase -> (rooms, open connections)
+        stats: dict[str, tuple[int, int]] = {}
+        for code, room in self._rooms.items():
+            n_rooms, n_conns = stats.get(room.phase, (0, 0))
+            stats[room.phase] = (n_rooms + 1, n_conns + len(self._connections.get(code, ())))
+        return stats
+
+    def suggestion_scope(self, room_code: str) -> tuple | None:
+        """Key of the room's candidate set, so suggestions only offer titles
+        that can actually come up."""
+        room = self.get_room(room_code)
+        if not room:
+            return None
+        return QUESTION_SAMPLER.key(room.sort_by, room.difficulty, room.genres, room.pool_size)
+
     def get_player_for_ws(self, ws: Any) -> tuple[str, str] | None:
         return self._ws_to_player.get(id(ws))
 
+    @traced()
     def start_game(self, room_code: str, pool_path: str) -> bool:
         code = (room_code or "").upper()
         room = self._rooms.get(code)
-        if not room or room.phase != "lobby":
+        # A finished room can start again straight away (rematch).
+        if not room or room.phase not in ("lobby", "results"):
             return False
-        
-        pool = load_pool(pool_path)
-        
-        # Sort the pool based on the room's sort_by setting
-        if room.sort_by == "rating":
-            pool.sort(key=lambda x: x.get("rating", 0), reverse=True)
-        else: # Default to views
-            pool.sort(key=lambda x: x.get("views", 0), reverse=True)
-
-        if room.genres:
-            selected_genres = set(room.genres)
-            pool = [
-                item for item in pool
-                if selected_genres.issubset(item.get("genres", []))
-            ]
-
-        if room.difficulty == "easy":
-            pool = pool[:50]
-        elif room.difficulty == "medium":
-            pool = pool[:200]
-        elif room.difficulty == "custom" and room.pool_size:
-            pool = pool[:room.pool_size]
-        
-        if not pool:
-            pool = load_pool(pool_path)[:20]
 
-        if len(pool) < room.rounds_total:
-            room.rounds_total = len(pool)
+        if not load_pool(pool_path):
+            return False
+        candidates = QUESTION_SAMPLER.candidates(room.sort_by, room.difficulty, room.genres, room.pool_size)
+
+        if len(candidates) < room.rounds_total:
+            room.rounds_total = len(candidates)
         
         if room.rounds_total == 0:
              return False
 
-        room.questions = pick_questions(pool, room.rounds_total)
+        questions = candidates.sample(room.rounds_total, random, set(room.recent_question_ids))
+        self._begin_game(room, questions)
+        self._record("start", code, [q.get("id") for q in questions])
+        return True
+
+    def _begin_game(self, room: RoomState, questions: list[dict]) -> None:
+        room.questions = questions
+        room.rounds_total = len(questions)
+        room.recent_question_ids.extend(q.get("id") for q in questions)
+        for p in room.players.values():
+            p.score = 0
         room.phase = "playing"
         room.round_index = 0
+        room.answers = {}
+        room.current_question = None
         room.results = []
-        return True
+        room.result_frames = []
+        room.game_number += 1
+
+    def result_page(self, room_code: str, offset: int, limit: int) -> bytes | None:
+        room = self.get_room(room_code)
+        if not room:
+            return None
+        frames = room.result_frames[offset:offset + limit]
+        head = f'{{"game":{room.game_number},"total":{len(room.result_frames)},"offset":{offset},"rounds":['
+        return head.encode() + b",".join(frames) + b"]}"
 
     def get_current_question(self, room_code: str) -> dict | None:
         room = self.get_room(room_code)
@@ -224,20 +282,46 @@ class RoomManager:
         q = room.questions[room.round_index]
         return {"manga_id": q["id"], "title": q["title"], "cover_filename": q.get("cover_filename", "")}
 
+    @traced()
     def start_round(self, room_code: str) -> dict | None:
         room = self.get_room(room_code)
         if not room or room.phase != "playing":
             return None
         room.current_question = self.get_current_question(room_code)
         room.answers = {}
+        room.pending_answers.clear()
         room.round_ends_at = time.time() + room.seconds_per_round
+        self._record("round", room.room_code, (room.round_index, room.round_ends_at))
         return room.current_question
 
-    def submit_answer(self, room_code: str, player_id: str, answer: str) -> None:
+    def reset_round_deadline(self, room_code: str) -> None:
+        """Give the current round a full clock again, keeping its answers."""
+        room = self.get_room(room_code)
+        if not room or room.phase != "playing" or not room.current_question:
+            return
+        room.round_ends_at = time.time() + room.seconds_per_round
+        self._record("deadline", room.room_code, room.round_ends_at)
+
+    @traced()
+    def submit_answer(self, room_code: str, player_id: str, answer: str, journal: bool = True) -> None:
+        """Store the player's latest answer. With `journal=False` (a throttled
+        message) the write is deferred until the round ends, so overwrites
+        past the rate limit cost no journal lines."""
         room = self.get_room((room_code or "").upper())
-        if room and room.phase == "playing":
-            room.answers[player_id] = (answer or "").strip()
+        # No question between rounds means nothing to answer.
+        if not room or room.phase != "playing" or not room.current_question:
+            return
+        answer = (answer or "").strip()
+        if room.answers.get(player_id) == answer:
+            return
+        room.answers[player_id] = answer
+        if not journal:
+            room.pending_answers.add(player_id)
+            return
+        room.pending_answers.discard(player_id)
+        self._record("answer", room.room_code, (player_id, answer))
 
+    @traced()
     def all_players_answered(self, room_code: str) -> bool:
         room = self.get_room((room_code or "").upper())
         if not room or room.phase != "playing": return False
@@ -251,11 +335,17 @@ class RoomManager:
                 return False
         return True
 
+    @traced()
     def end_round_and_advance(self, room_code: str) -> dict | None:
         code = (room_code or "").upper()
         room = self._rooms.get(code)
         if not room or room.phase != "playing" or not room.current_question:
             return None
+        for pid in room.pending_answers:
+            if pid in room.answers:
+                self._record("answer", code, (pid, room.answers[pid]))
+        room.pending_answers.clear()
+        self._record("round_end", code)
         correct = room.current_question.get("title", "")
         for pid, p in room.players.items():
             pts = score_answer(room.answers.get(pid, ""), correct, room.points_exact, room.points_fuzzy)
@@ -263,17 +353,25 @@ class RoomManager:
         result = {
             "correct_title": correct,
             "scores": [{"player_id": pid, "name": p.name, "score": p.score} for pid, p in room.players.items()],
-            "answers": room.answers,
+            "answers": dict(room.answers),
         }
         room.results.append(result)
+        room.result_frames.append(_encode_result(len(room.results) - 1, result))
         room.round_index += 1
         if room.round_index >= len(room.questions):
             room.phase = "results"
             room.current_question = None
-            return {"event": "game_over", "results": room.results, "scores": result["scores"]}
+            # Full per-round detail stays server-side behind the history handle.
+            return {
+                "event": "game_over",
+                "result": result,
+                "scores": result["scores"],
+                "history": {"game": room.game_number, "rounds": len(room.results)},
+            }
         room.current_question = None
         return {"event": "round_end", "result": result}
 
+    @traced()
     def state_for_room(self, room_code: str, round_ends_at_override: float | None = None) -> dict:        
         code = (room_code or "").upper()
         room = self._rooms.get(code)
@@ -300,4 +398,99 @@ class RoomManager:
             "results": room.results[-1:] if room.results else [],
         }
 
+    # ── Crash recovery ──────────────────────────────────────────────────────
+
+    def snapshot(self) -> dict:
+        """Plain-data copy of every room, safe to hand to another thread."""
+        return {
+            code: {
+                **{f: getattr(room, f) for f in ("owner_id", *ROOM_SETTINGS)},
+                "players": [[p.id, p.name, p.score] for p in room.players.values()],
+                "phase": room.phase,
+                "round_index": room.round_index,
+                "questions": [q.get("id") for q in room.questions],
+                "current_question": room.current_question,
+                "round_ends_at": room.round_ends_at,
+                "answers": dict(room.answers),
+                "results": list(room.results),
+                "game_number": room.game_number,
+                "recent_question_ids": list(room.recent_question_ids),
+            }
+            for code, room in self._rooms.items()
+        }
+
+    def restore(self, snapshot: dict, events: list[tuple[str, str, Any]], pool: list[dict]) -> int:
+        """Rebuild rooms from a snapshot plus the journal events after it.
+        Returns the number of rooms restored."""
+        journal, self.journal = self.journal, None  # don't re-log the replay
+        by_id = {item.get("id"): item for item in pool}
+        try:
+            for code, data in snapshot.items():
+                room = RoomState(room_code=code, **{f: data[f] for f in ("owner_id", *ROOM_SETTINGS)})
+                room.players = {pid: Player(id=pid, name=name, score=score) for pid, name, score in data["players"]}
+                room.phase = data["phase"]
+                room.round_index = data["round_index"]
+                room.questions = [by_id[i] for i in data["questions"] if i in by_id]
+                room.current_question = data["current_question"]
+                room.round_ends_at = data["round_ends_at"]
+                room.answers = data["answers"]
+                room.results = data["results"]
+                room.result_frames = [_encode_result(i, r) for i, r in enumerate(room.results)]
+                room.game_number = data.get("game_number", 0)
+                room.recent_question_ids.extend(data["recent_question_ids"])
+                self._rooms[code] = room
+            for kind, code, data in events:
+                self._replay(kind, code, data, by_id)
+            # Nobody ever joined these; without players there is no grace
+            # timer to remove them, so they would outlive every restart.
+            for code in [code for code, room in self._rooms.items() if not room.players]:
+                del self._rooms[code]
+        finally:
+            self.journal = journal
+        return len(self._rooms)
+
+    def _replay(self, kind: str, code: str, data: Any, by_id: dict[str, dict]) -> None:
+        if kind == "create":
+            self._rooms[code] = RoomState(room_code=code, **data)
+            return
+        room = self._rooms.get(code)
+        if not room:
+            return
+        if kind == "join":
+            pid, name = data
+            room.players[pid] = Player(id=pid, name=name)
+        elif kind == "leave":
+            room.players.pop(data, None)
+            if not room.players:
+                self._rooms.pop(code, None)
+        elif kind == "start":
+            self._begin_game(room, [by_id[i] for i in data if i in by_id])
+        elif kind == "round":
+            room.round_index, room.round_ends_at = data
+            room.current_question = self.get_current_question(code)
+            room.answers = {}
+        elif kind == "deadline":
+            room.round_ends_at = data
+        elif kind == "answer":
+            pid, answer = data
+            room.answers[pid] = answer
+        elif kind == "round_end":
+            self.end_round_and_advance(code)
+
+    def player_ids(self, room_code: str) -> list[str]:
+        room = self.get_room(room_code)
+        return list(room.players) if room else []
+
+    def room_codes(self) -> list[str]:
+        return list(self._rooms)
+
+    def codes_in_phase(self, phase: str) -> list[str]:
+        return [code for code, room in self._rooms.items() if room.phase == phase]
+
+
+def _encode_result(round_index: int, result: dict) -> bytes:
+    payload = {"round": round_index, **result}
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
 rooms = RoomManager()
@@ -0,0 +1,151 @@
+import random
+from collections import OrderedDict
+
+from config import settings
+
+SORT_KEYS = ("views", "rating")
+TIER_LIMITS = {"easy": 50, "medium": 200}
+
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per weighted draw."""
+
+    __slots__ = ("prob", "alias")
+
+    def __init__(self, weights: list[float]):
+        n = len(weights)
+        total = sum(weights) or 1.0
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, w in enumerate(scaled) if w < 1.0]
+        large = [i for i, w in enumerate(scaled) if w >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+
+    def draw(self, rng: random.Random) -> int:
+        i = int(rng.random() * len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class CandidateSet:
+    """The ordered questions a room configuration can draw from."""
+
+    __slots__ = ("items", "weights", "_alias")
+
+    def __init__(self, items: list[dict], exponent: float):
+        self.items = items
+        # Rank-based popularity: the pool is already ordered by the room's
+        # sort key, so earlier entries are drawn more often.
+        self.weights = [(rank + 1) ** -exponent for rank in range(len(items))]
+        self._alias: AliasTable | None = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def alias_table(self) -> AliasTable:
+        if self._alias is None:
+            self._alias = AliasTable(self.weights)
+        return self._alias
+
+    def sample(self, count: int, rng: random.Random, exclude: set[str] | None = None) -> list[dict]:
+        n = len(self.items)
+        count = min(count, n)
+        exclude = exclude or set()
+        chosen: list[int] = []
+        taken: set[int] = set()
+
+        if count * 3 <= n:
+            # Sparse draw: rejection sampling stays O(count) in expectation.
+            alias = self.alias_table()
+            for _ in range(count * 30):
+                if len(chosen) >= count:
+                    break
+                i = alias.draw(rng)
+                if i in taken or self.items[i].get("id") in exclude:
+                    continue
+                taken.add(i)
+                chosen.append(i)
+
+        if len(chosen) < count:
+            # Small tier or mostly excluded: weighted shuffle of the whole set
+            # (Efraimidis-Spirakis keys), preferring titles not seen recently.
+            order = sorted(
+                (i for i in range(n) if i not in taken),
+                key=lambda i: rng.random() ** (1.0 / self.weights[i]),
+                reverse=True,
+            )
+            fresh = [i for i in order if self.items[i].get("id") not in exclude]
+            stale = [i for i in order if self.items[i].get("id") in exclude]
+            chosen.extend((fresh + stale)[: count - len(chosen)])
+
+        return [self.items[i] for i in chosen]
+
+
+class QuestionSampler:
+    """Per-sort-order views of the pool, built once at load, plus an LRU of
+    candidate sets keyed by room configuration."""
+
+    def __init__(self, cache_size: int = 128, exponent: float = 0.5):
+        self.cache_size = cache_size
+        self.exponent = exponent
+        self._orders: dict[str, list[dict]] = {key: [] for key in SORT_KEYS}
+        self._cache: OrderedDict[tuple, CandidateSet] = OrderedDict()
+
+    def rebuild(self, pool: list[dict]) -> None:
+        self._orders = {
+            key: sorted(pool, key=lambda x, key=key: x.get(key, 0) or 0, reverse=True)
+            for key in SORT_KEYS
+        }
+        self._cache.clear()
+        # Warm the preset tiers so the first game of each kind is instant.
+        for sort_by in SORT_KEYS:
+            for difficulty in ("easy", "medium", "hard"):
+                self.candidates(sort_by, difficulty).alias_table()
+
+    @staticmethod
+    def key(sort_by: str | None, difficulty: str | None, genres: list[str] | None = None, pool_size: int | None = None) -> tuple:
+        sort_by = sort_by if sort_by in SORT_KEYS else "views"
+        difficulty = difficulty or "medium"
+        genre_key = tuple(sorted(set(genres))) if genres else ()
+        size_key = pool_size if difficulty == "custom" else None
+        return sort_by, difficulty, genre_key, size_key
+
+    def candidates(
+        self,
+        sort_by: str | None,
+        difficulty: str | None,
+        genres: list[str] | None = None,
+        pool_size: int | None = None,
+    ) -> CandidateSet:
+        key = self.key(sort_by, difficulty, genres, pool_size)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        candidates = CandidateSet(self._select(*key), self.exponent)
+        self._cache[key] = candidates
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return candidates
+
+    def _select(self, sort_by: str, difficulty: str, genres: tuple, pool_size: int | None) -> list[dict]:
+        order = self._orders[sort_by]
+        items = order
+        if genres:
+            selected = set(genres)
+            items = [item for item in order if selected.issubset(item.get("genres", []))]
+        if difficulty in TIER_LIMITS:
+            items = items[:TIER_LIMITS[difficulty]]
+        elif difficulty == "custom" and pool_size:
+            items = items[:pool_size]
+        if not items:
+            items = order[:20]
+        return items
+
+
+QUESTION_SAMPLER = QuestionSampler(settings.candidate_cache_size, settings.question_weight_exponent)
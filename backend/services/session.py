@@ -0,0 +1,113 @@
+import asyncio
+import heapq
+import logging
+from collections import deque
+from typing import Callable, Hashable
+
+from services.protocol import encode
+
+logger = logging.getLogger(__name__)
+
+
+class EventLog:
+    """Bounded, sequenced history of one room's broadcasts, so a client that
+    reconnects with its last seen `seq` can be sent just what it missed.
+
+    Entries keep the message and the frames the broadcast actually encoded
+    (encoding -> frame); other encodings are produced on first resume and
+    cached. Each `room_state` is a full snapshot, so only the newest one is
+    kept.
+    """
+
+    __slots__ = ("seq", "_events", "_state", "_evicted")
+
+    def __init__(self, capacity: int):
+        self.seq = 0
+        self._events: deque[tuple[int, str, dict, dict]] = deque(maxlen=capacity)
+        self._state: tuple[int, str, dict, dict] | None = None
+        self._evicted = 0  # highest seq pushed out of `_events`
+
+    def next_seq(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def record(self, seq: int, kind: str, message: dict, frames: dict[str, str | bytes]) -> None:
+        entry = (seq, kind, message, frames)
+        if kind == "room_state":
+            self._state = entry
+            return
+        if len(self._events) == self._events.maxlen:
+            self._evicted = self._events[0][0]
+        self._events.append(entry)
+
+    def since(self, seq: int, encoding: str) -> list[tuple[str, str | bytes]] | None:
+        """(kind, frame) after `seq` in order, or None when some are gone."""
+        if seq > self.seq or seq < self._evicted:
+            return None
+        missed = [entry for entry in self._events if entry[0] > seq]
+        if self._state is not None and self._state[0] > seq:
+            missed.append(self._state)
+            missed.sort(key=lambda entry: entry[0])
+        out = []
+        for _, kind, message, frames in missed:
+            frame = frames.get(encoding)
+            if frame is None:
+                frame = frames[encoding] = encode(message, encoding)
+            out.append((kind, frame))
+        return out
+
+
+class GraceTimers:
+    """Deadlines for disconnected players, kept in one heap and expired by a
+    single task instead of one sleeping task per disconnect.
+
+    Rescheduling or cancelling a key leaves its old heap entry behind; stale
+    entries are recognised by their deadline and skipped when popped.
+    """
+
+    def __init__(self, on_expire: Callable[[Hashable], None]):
+        self._on_expire = on_expire
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._deadlines: dict[Hashable, float] = {}
+        self._counter = 0  # tie-breaker so keys never get compared
+        self._wake = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, key: Hashable, delay: float) -> None:
+        deadline = asyncio.get_running_loop().time() + delay
+        self._deadlines[key] = deadline
+        self._counter += 1
+        heapq.heappush(self._heap, (deadline, self._counter, key))
+        if self._heap[0][2] == key:
+            self._wake.set()
+
+    def cancel(self, key: Hashable) -> None:
+        self._deadlines.pop(key, None)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            timeout = None
+            while self._heap:
+                deadline, _, key = self._heap[0]
+                if self._deadlines.get(key) != deadline:
+                    heapq.heappop(self._heap)
+                    continue
+                timeout = deadline - loop.time()
+                if timeout > 0:
+                    break
+                heapq.heappop(self._heap)
+                del self._deadlines[key]
+                try:
+                    self._on_expire(key)
+                except Exception:
+                    # One bad expiry must not stop the shared sweeper.
+                    logger.exception("Grace timer callback failed for %r", key)
+                timeout = None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,126 @@
+import functools
+import time
+from collections import deque
+from typing import Any, Callable
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "room", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, room: str | None):
+        self.tracer = tracer
+        self.name = name
+        self.room = room
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.room, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    """Span recorder that can be switched on at runtime. While disabled,
+    `span()` hands back a shared no-op context manager."""
+
+    def __init__(self, capacity: int = 5000):
+        self.enabled = False
+        self.enabled_at = 0.0
+        self._recent: deque[tuple[str, str | None, float, float]] = deque(maxlen=capacity)
+        self._by_name: dict[str, list[float]] = {}  # name -> [count, total, max]
+        self._by_room: dict[str, list[float]] = {}
+
+    def enable(self, capacity: int | None = None) -> None:
+        if capacity:
+            self._recent = deque(maxlen=capacity)
+        self.reset()
+        self.enabled = True
+        self.enabled_at = time.time()
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self._recent.clear()
+        self._by_name.clear()
+        self._by_room.clear()
+
+    def span(self, name: str, room: str | None = None):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, room)
+
+    def record(self, name: str, room: str | None, start: float, duration: float) -> None:
+        self._recent.append((name, room, start, duration))
+        for key, table in ((name, self._by_name), (room, self._by_room)):
+            if key is None:
+                continue
+            agg = table.get(key)
+            if agg is None:
+                table[key] = [1, duration, duration]
+            else:
+                agg[0] += 1
+                agg[1] += duration
+                if duration > agg[2]:
+                    agg[2] = duration
+
+    def summary(self, room: str | None = None, limit: int = 50) -> dict:
+        def rows(table: dict[str, list[float]]) -> list[dict]:
+            out = [
+                {"key": k, "count": int(c), "total_ms": t * 1000, "mean_ms": t / c * 1000, "max_ms": m * 1000}
+                for k, (c, t, m) in table.items()
+            ]
+            return sorted(out, key=lambda r: r["total_ms"], reverse=True)
+
+        recent = [s for s in self._recent if room is None or s[1] == room]
+        slowest = sorted(recent, key=lambda s: s[3], reverse=True)[:limit]
+        return {
+            "enabled": self.enabled,
+            "enabled_at": self.enabled_at,
+            "spans": rows(self._by_name),
+            "rooms": rows(self._by_room)[:limit],
+            "slowest": [{"name": n, "room": r, "duration_ms": d * 1000} for n, r, _, d in slowest],
+        }
+
+
+TRACER = Tracer()
+
+
+def span(name: str, room: str | None = None):
+    return TRACER.span(name, room)
+
+
+def traced(name: str | None = None) -> Callable:
+    """Record a span around a RoomManager-style method whose first argument
+    after `self` is the room code."""
+
+    def wrap(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args: Any, **kwargs: Any):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            room = args[1] if len(args) > 1 else kwargs.get("room_code")
+            room = room.upper() if isinstance(room, str) else None
+            with _Span(TRACER, span_name, room):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
@@ -4,8 +4,8 @@ import { useCallback, useEffect, useState } from "react";
 import { useParams, useSearchParams } from "next/navigation";
 import Image from "next/image";
 import Link from "next/link";
-import { getCoverUrl, fetchCoverAsBlob } from "@/lib/api";
-import { useRoomSocket, type Player, type RoomState } from "@/hooks/useRoomSocket";
+import { getCoverUrl, fetchCoverAsBlob, getResultHistory, type RoundResult } from "@/lib/api";
+import { useRoomSocket, type Player, type ResultHistory, type RoomState } from "@/hooks/useRoomSocket";
 import AnswerCombobox from "@/components/AnswerCombobox";
 import TimerBar from "@/components/TimerBar";
 
@@ -111,8 +111,8 @@ export default function RoomPage() {
     <main className="min-h-screen max-w-3xl mx-auto p-4 space-y-4">
       <Header code={code} status={socket.connectionStatus} state={state} />
       {inLobby     && <LobbyView state={state} playerId={playerId} isOwner={socket.isOwner} onStart={socket.sendStart} />}
-      {playing     && <PlayingView state={state} playerId={playerId} secondsLeft={socket.secondsLeft} answered={answered} onSubmit={handleSubmitAnswer} />}
-      {showResults && <ResultsView state={state} playerId={playerId} lastResult={socket.lastResult!} gameOverScores={socket.gameOverScores} />}
+      {playing     && <PlayingView state={state} playerId={playerId} secondsLeft={socket.secondsLeft} answered={answered} onSubmit={handleSubmitAnswer} onSuggest={socket.requestSuggestions} />}
+      {showResults && <ResultsView state={state} playerId={playerId} lastResult={socket.lastResult!} gameOverScores={socket.gameOverScores} history={socket.resultHistory} isOwner={socket.isOwner} onPlayAgain={socket.sendStart} />}
     </main>
   );
 }
@@ -280,12 +280,14 @@ function PlayingView({
   secondsLeft,
   answered,
   onSubmit,
+  onSuggest,
 }: {
   state: RoomState;
   playerId: string;
   secondsLeft: number | null;
   answered: string | false;
   onSubmit: (v: string) => void;
+  onSuggest: (q: string) => Promise<string[]>;
 }) {
   const { current_question: q } = state;
   const [popupImageUrl, setPopupImageUrl] = useState<string | null>(null);
@@ -356,6 +358,7 @@ function PlayingView({
             disabled={secondsLeft === 0}
             roomCode={state.room_code}
             suggestionsEnabled={state.suggestions_enabled}
+            fetchSuggestions={onSuggest}
           />
         </div>
 
@@ -398,7 +401,7 @@ function PlayingView({
   );
 }
 
-function ResultsView({ state, playerId, lastResult, gameOverScores }: { state: RoomState; playerId: string; lastResult: RoomState["results"][0]; gameOverScores: { player_id: string; name: string; score: number }[] | null; }) {
+function ResultsView({ state, playerId, lastResult, gameOverScores, history, isOwner, onPlayAgain }: { state: RoomState; playerId: string; lastResult: RoomState["results"][0]; gameOverScores: { player_id: string; name: string; score: number }[] | null; history: ResultHistory | null; isOwner: boolean; onPlayAgain: () => void; }) {
   const gameOver = !!gameOverScores;
   const finalScores = gameOverScores || lastResult.scores;
 
@@ -465,10 +468,25 @@ function ResultsView({ state, playerId, lastResult, gameOverScores }: { state: R
         })}
       </div>
       
+      {gameOver && history && <RoundHistory roomCode={state.room_code} history={history} playerId={playerId} />}
+
       {gameOver ? (
-        <Link href="/" className="block w-full py-3.5 text-center rounded-xl bg-[var(--primary)] hover:bg-[var(--primary-hover)] font-semibold">
-          Back to Lobby
-        </Link>
+        <div className="space-y-2">
+          {isOwner ? (
+            <button
+              type="button"
+              onClick={onPlayAgain}
+              className="w-full py-3.5 rounded-xl bg-[var(--primary)] hover:bg-[var(--primary-hover)] font-semibold"
+            >
+              Play Again
+            </button>
+          ) : (
+            <p className="text-center text-sm text-[var(--text-muted)]">Waiting for the host to start a rematch…</p>
+          )}
+          <Link href="/" className="block w-full py-3.5 text-center rounded-xl bg-white/10 hover:bg-white/15 font-semibold">
+            Back to Lobby
+          </Link>
+        </div>
       ) : (
         <p className="text-center text-xs text-[var(--text-dim)] animate-pulse">Next round starting…</p>
       )}
@@ -476,6 +494,49 @@ function ResultsView({ state, playerId, lastResult, gameOverScores }: { state: R
   );
 }
 
+const HISTORY_PAGE_SIZE = 10;
+
+function RoundHistory({ roomCode, history, playerId }: { roomCode: string; history: ResultHistory; playerId: string; }) {
+  const [rounds, setRounds] = useState<RoundResult[] | null>(null);
+  const [loading, setLoading] = useState(false);
+
+  // Per-round details aren't in game_over; page them in when asked.
+  const loadMore = async () => {
+    setLoading(true);
+    try {
+      const page = await getResultHistory(roomCode, rounds?.length ?? 0, HISTORY_PAGE_SIZE);
+      if (!page || page.game !== history.game) return;
+      setRounds((prev) => [...(prev ?? []), ...page.rounds]);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const hasMore = (rounds?.length ?? 0) < history.rounds;
+
+  return (
+    <div className="space-y-2">
+      {rounds && rounds.map((r) => (
+        <div key={r.round} className="flex items-center justify-between py-2 px-4 rounded-xl bg-black/20 text-sm">
+          <span className="text-[var(--text-dim)] w-8">#{r.round + 1}</span>
+          <span className="flex-1 font-semibold truncate">{r.correct_title}</span>
+          <span className="text-xs text-[var(--text-muted)] truncate max-w-[40%]">{r.answers[playerId] ?? "No answer"}</span>
+        </div>
+      ))}
+      {hasMore && (
+        <button
+          type="button"
+          onClick={loadMore}
+          disabled={loading}
+          className="w-full py-2 rounded-xl text-sm text-[var(--text-muted)] hover:bg-white/5"
+        >
+          {loading ? "Loading…" : rounds ? "Show more rounds" : "Show round-by-round results"}
+        </button>
+      )}
+    </div>
+  );
+}
+
 // ── Standalone forms / error states ────────────────────────────────────────
 
 function NameEntryForm({ code, name, setName, setNameSubmitted }: { code: string; name: string; setName: (n: string) => void; setNameSubmitted: (s: boolean) => void; }) {
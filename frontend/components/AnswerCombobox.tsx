@@ -9,6 +9,8 @@ type Props = {
   roomCode?: string;
   suggestionsEnabled?: boolean;
   placeholder?: string;
+  // Defaults to the HTTP endpoint; the room page passes the socket-backed lookup.
+  fetchSuggestions?: (q: string) => Promise<string[]>;
 };
 
 export default function AnswerCombobox({
@@ -17,6 +19,7 @@ export default function AnswerCombobox({
   roomCode,
   suggestionsEnabled = true,
   placeholder = "Type the manhwa title…",
+  fetchSuggestions: lookup,
 }: Props) {
   const [value, setValue] = useState("");
   const [suggestions, setSuggestions] = useState<string[]>([]);
@@ -64,7 +67,7 @@ export default function AnswerCombobox({
       const seq = ++requestSeqRef.current;
       setLoading(true);
       try {
-        const list = await getSuggestions(q, roomCode);
+        const list = lookup ? await lookup(q) : await getSuggestions(q, roomCode);
         if (seq !== requestSeqRef.current) return;
         setSuggestions(list);
         setHighlight(0);
@@ -73,7 +76,7 @@ export default function AnswerCombobox({
         if (seq === requestSeqRef.current) setLoading(false);
       }
     },
-    [roomCode, suggestionsEnabled]
+    [roomCode, suggestionsEnabled, lookup]
   );
 
   useEffect(() => {
@@ -1,7 +1,8 @@
 "use client";
 
 import { useCallback, useEffect, useRef, useState } from "react";
-import { getWsUrl } from "@/lib/api";
+import { getWsEncoding, getWsUrl } from "@/lib/api";
+import { decodeMessage } from "@/lib/protocol";
 
 export type RoomPhase = "lobby" | "playing" | "results";
 export type Player = { id: string; name: string; score: number };
@@ -26,16 +27,23 @@ export type RoomState = {
   results: Array<{ correct_title: string; scores: { player_id: string; name: string; score: number }[]; answers: Record<string, string> }>;
 };
 
+// Handle for fetching per-round details with getResultHistory().
+export type ResultHistory = { game: number; rounds: number };
+
 type WsMessage =
-  | { event: "joined"; player_id: string; owner_id: string; state: RoomState }
+  | { event: "joined"; player_id: string; owner_id: string; server_time: number; seq: number; resume_token: string; state: RoomState }
+  | { event: "resumed"; player_id: string; server_time: number; seq: number }
   | { event: "room_state"; state: RoomState }
   | { event: "round_start"; state: RoomState }
   | { event: "tick"; seconds_left: number }
   | { event: "answer_received" }
   | { event: "round_end"; result: RoomState["results"][0] }
-  | { event: "game_over"; results: RoomState["results"]; scores: { player_id: string; name: string; score: number }[] }
+  | { event: "game_over"; result: RoomState["results"][0]; scores: { player_id: string; name: string; score: number }[]; history: ResultHistory }
+  | { event: "suggestions"; id: number; suggestions: string[] }
   | { event: "error"; message: string };
 
+const SUGGEST_TIMEOUT_MS = 2000;
+
 function getStoredPlayerId(roomCode: string): string {
   const key = `manhwa-quiz-pid-${roomCode.toUpperCase()}`;
   let id = sessionStorage.getItem(key);
@@ -54,12 +62,21 @@ export function useRoomSocket(roomCode: string, playerName: string, ownerId: str
   const [connectionStatus, setConnectionStatus] = useState<"connecting" | "connected" | "reconnecting" | "disconnected">("connecting");
   const [lastResult, setLastResult] = useState<RoomState["results"][0] | null>(null);
   const [gameOverScores, setGameOverScores] = useState<{ player_id: string; name: string; score: number }[] | null>(null);
+  const [resultHistory, setResultHistory] = useState<ResultHistory | null>(null);
   const [isBetweenRounds, setIsBetweenRounds] = useState(false);
+  const [roundEndsAt, setRoundEndsAt] = useState<number | null>(null);
   const [mounted, setMounted] = useState(false);
 
   const wsRef = useRef<WebSocket | null>(null);
   const isActiveRef = useRef(true);
   const reconnectTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  // Server clock minus local clock, in seconds. Set from `server_time` on join.
+  const clockOffsetRef = useRef(0);
+  const suggestSeqRef = useRef(0);
+  // Lets a reconnect replay only the broadcasts missed since `lastSeqRef`.
+  const resumeTokenRef = useRef<string | null>(null);
+  const lastSeqRef = useRef(0);
+  const pendingSuggestRef = useRef(new Map<number, (list: string[]) => void>());
   
   const code = roomCode.trim().toUpperCase();
   const name = playerName.trim();
@@ -69,6 +86,23 @@ export function useRoomSocket(roomCode: string, playerName: string, ownerId: str
     setMounted(true);
   }, []);
 
+  const flushPendingSuggestions = useCallback(() => {
+    pendingSuggestRef.current.forEach((resolve) => resolve([]));
+    pendingSuggestRef.current.clear();
+  }, []);
+
+  // 2. Count down locally from the authoritative `round_ends_at`
+  useEffect(() => {
+    if (roundEndsAt === null) return;
+    const update = () => {
+      const now = Date.now() / 1000 + clockOffsetRef.current;
+      setSecondsLeft(Math.max(0, Math.ceil(roundEndsAt - now)));
+    };
+    update();
+    const id = setInterval(update, 250);
+    return () => clearInterval(id);
+  }, [roundEndsAt]);
+
   const connect = useCallback(() => {
     if (!mounted || !code || !name) return;
     
@@ -91,9 +125,18 @@ export function useRoomSocket(roomCode: string, playerName: string, ownerId: str
     if (ownerId) {
       params.set("owner_id", ownerId);
     }
+    const encoding = getWsEncoding();
+    if (encoding !== "json") {
+      params.set("encoding", encoding);
+    }
+    if (resumeTokenRef.current) {
+      params.set("resume_token", resumeTokenRef.current);
+      params.set("last_seq", String(lastSeqRef.current));
+    }
 
     const wsUrl = `${base}/ws?${params.toString()}`;
     const ws = new WebSocket(wsUrl);
+    ws.binaryType = "arraybuffer";
     wsRef.current = ws;
 
     ws.onopen = () => {
@@ -107,31 +150,50 @@ export function useRoomSocket(roomCode: string, playerName: string, ownerId: str
     ws.onmessage = (event) => {
       if (!isActiveRef.current) return;
       try {
-        const msg: WsMessage = JSON.parse(event.data);
+        const msg = decodeMessage<WsMessage>(event.data);
+        const seq = (msg as { seq?: number }).seq;
+        if (typeof seq === "number") lastSeqRef.current = seq;
         if (msg.event === "joined") {
+          resumeTokenRef.current = msg.resume_token;
+          clockOffsetRef.current = msg.server_time - Date.now() / 1000;
           setOwnerIdFromServer(msg.owner_id);
           setState(msg.state);
+          setRoundEndsAt(msg.state.phase === "playing" && msg.state.current_question ? msg.state.round_ends_at : null);
           setLastResult(null);
           setGameOverScores(null);
+          setResultHistory(null);
+        } else if (msg.event === "resumed") {
+          // Local state is still current; missed events follow this message.
+          clockOffsetRef.current = msg.server_time - Date.now() / 1000;
         } else if (msg.event === "room_state") {
           setState(msg.state);
         } else if (msg.event === "round_start") {
           setIsBetweenRounds(false);
           setState(msg.state);
-          setSecondsLeft(Math.max(0, Math.ceil(msg.state.round_ends_at - Date.now() / 1000)));
+          setRoundEndsAt(msg.state.round_ends_at);
           setLastResult(null);
+          setGameOverScores(null);
+          setResultHistory(null);
         } else if (msg.event === "tick") {
           setSecondsLeft(msg.seconds_left);
         } else if (msg.event === "round_end") {
           setIsBetweenRounds(true);
+          setRoundEndsAt(null);
           setSecondsLeft(0);
           setLastResult(msg.result);
           setState((s) => (s ? { ...s, results: [...s.results, msg.result] } : null));
         } else if (msg.event === "game_over") {
           setIsBetweenRounds(false);
+          setRoundEndsAt(null);
           setGameOverScores(msg.scores);
-          setLastResult(msg.results[msg.results.length - 1] ?? null);
-          setState((s) => (s ? { ...s, phase: "results" as const } : null));
+          setResultHistory(msg.history);
+          setLastResult(msg.result);
+          setState((s) => (s ? { ...s, phase: "results" as const, results: [...s.results, msg.result] } : null));
+        } else if (msg.event === "suggestions") {
+          // Responses for superseded requests were already resolved; drop them.
+          const resolve = pendingSuggestRef.current.get(msg.id);
+          pendingSuggestRef.current.delete(msg.id);
+          resolve?.(msg.suggestions);
         } else if (msg.event === "error") {
           if (msg.message === "room_not_found" || msg.message === "join_failed") {
             isActiveRef.current = false;
@@ -145,6 +207,7 @@ export function useRoomSocket(roomCode: string, playerName: string, ownerId: str
 
     ws.onclose = () => {
       wsRef.current = null;
+      flushPendingSuggestions();
       if (!isActiveRef.current) return;
       
       setConnectionStatus("reconnecting");
@@ -154,7 +217,7 @@ export function useRoomSocket(roomCode: string, playerName: string, ownerId: str
     };
 
     ws.onerror = () => {};
-  }, [code, name, ownerId, mounted]);
+  }, [code, name, ownerId, mounted, flushPendingSuggestions]);
 
   useEffect(() => {
     isActiveRef.current = true;
@@ -180,6 +243,21 @@ export function useRoomSocket(roomCode: string, playerName: string, ownerId: str
     }
   }, []);
 
+  const requestSuggestions = useCallback((q: string): Promise<string[]> => {
+    const ws = wsRef.current;
+    if (!ws || ws.readyState !== WebSocket.OPEN) return Promise.resolve([]);
+    // Only the newest request matters; settle older ones immediately.
+    flushPendingSuggestions();
+    const id = ++suggestSeqRef.current;
+    return new Promise((resolve) => {
+      pendingSuggestRef.current.set(id, resolve);
+      ws.send(JSON.stringify({ type: "suggest", id, q, limit: 10 }));
+      setTimeout(() => {
+        if (pendingSuggestRef.current.delete(id)) resolve([]);
+      }, SUGGEST_TIMEOUT_MS);
+    });
+  }, [flushPendingSuggestions]);
+
   const sendAnswer = useCallback((answer: string) => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       wsRef.current.send(JSON.stringify({ type: "submit_answer", answer }));
@@ -196,9 +274,11 @@ export function useRoomSocket(roomCode: string, playerName: string, ownerId: str
     connectionStatus,
     lastResult,
     gameOverScores,
+    resultHistory,
     isBetweenRounds,
     sendStart,
     sendAnswer,
+    requestSuggestions,
     reconnect: connect,
   };
 }
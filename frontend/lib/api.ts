@@ -1,6 +1,9 @@
+import type { WsEncoding } from "@/lib/protocol";
+
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 const WS_URL = process.env.NEXT_PUBLIC_WS_URL || "ws://localhost:8000";
 const API_KEY = process.env.NEXT_PUBLIC_API_KEY || "secret";
+const WS_ENCODING: WsEncoding = process.env.NEXT_PUBLIC_WS_ENCODING === "msgpack" ? "msgpack" : "json";
 
 export function getApiUrl(): string {
   return API_URL;
@@ -10,6 +13,10 @@ export function getWsUrl(): string {
   return WS_URL;
 }
 
+export function getWsEncoding(): WsEncoding {
+  return WS_ENCODING;
+}
+
 export type CreateRoomPayload = {
   room_code?: string;
   rounds_total?: number;
@@ -57,6 +64,28 @@ export async function getGenres(): Promise<string[]> {
   }
 }
 
+export type RoundResult = {
+  round: number;
+  correct_title: string;
+  scores: { player_id: string; name: string; score: number }[];
+  answers: Record<string, string>;
+};
+
+export type RoundResultPage = { game: number; total: number; offset: number; rounds: RoundResult[] };
+
+export async function getResultHistory(roomCode: string, offset = 0, limit = 10): Promise<RoundResultPage | null> {
+  const params = new URLSearchParams({ offset: String(offset), limit: String(limit) });
+  try {
+    const r = await fetch(`${API_URL}/api/rooms/${encodeURIComponent(roomCode.toUpperCase())}/results?${params}`, {
+      headers: { "X-API-Key": API_KEY },
+    });
+    if (!r.ok) return null;
+    return await r.json();
+  } catch {
+    return null;
+  }
+}
+
 export async function getSuggestions(q: string, roomCode?: string): Promise<string[]> {
   const params = new URLSearchParams({ q, limit: "10" });
   if (roomCode) params.set("room_code", roomCode);
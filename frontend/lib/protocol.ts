@@ -0,0 +1,103 @@
+// Wire protocol helpers for the room WebSocket.
+//
+// JSON text frames are the default. When `NEXT_PUBLIC_WS_ENCODING=msgpack` the
+// server sends MessagePack binary frames with a compact numeric event code in
+// `e` instead of the `event` string. Keep EVENT_NAMES in sync with
+// `backend/services/protocol.py`.
+
+export type WsEncoding = "json" | "msgpack";
+
+const EVENT_NAMES: Record<number, string> = {
+  1: "joined",
+  2: "room_state",
+  3: "round_start",
+  4: "tick",
+  5: "answer_received",
+  6: "round_end",
+  7: "game_over",
+  8: "error",
+  9: "suggestions",
+  10: "resumed",
+};
+
+const textDecoder = new TextDecoder();
+
+// Minimal MessagePack decoder covering the types the server emits
+// (nil, bool, ints, floats, str, bin, array, map).
+function unpack(buf: Uint8Array): unknown {
+  const view = new DataView(buf.buffer, buf.byteOffset, buf.byteLength);
+  let pos = 0;
+
+  const str = (len: number) => {
+    const s = textDecoder.decode(buf.subarray(pos, pos + len));
+    pos += len;
+    return s;
+  };
+  const bin = (len: number) => {
+    const b = buf.slice(pos, pos + len);
+    pos += len;
+    return b;
+  };
+  const arr = (len: number) => {
+    const out: unknown[] = new Array(len);
+    for (let i = 0; i < len; i++) out[i] = read();
+    return out;
+  };
+  const map = (len: number) => {
+    const out: Record<string, unknown> = {};
+    for (let i = 0; i < len; i++) {
+      const k = read();
+      out[String(k)] = read();
+    }
+    return out;
+  };
+
+  function read(): unknown {
+    const b = view.getUint8(pos++);
+    if (b <= 0x7f) return b;
+    if (b >= 0xe0) return b - 0x100;
+    if ((b & 0xf0) === 0x80) return map(b & 0x0f);
+    if ((b & 0xf0) === 0x90) return arr(b & 0x0f);
+    if ((b & 0xe0) === 0xa0) return str(b & 0x1f);
+    let v: number;
+    switch (b) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xc4: v = view.getUint8(pos); pos += 1; return bin(v);
+      case 0xc5: v = view.getUint16(pos); pos += 2; return bin(v);
+      case 0xc6: v = view.getUint32(pos); pos += 4; return bin(v);
+      case 0xca: v = view.getFloat32(pos); pos += 4; return v;
+      case 0xcb: v = view.getFloat64(pos); pos += 8; return v;
+      case 0xcc: v = view.getUint8(pos); pos += 1; return v;
+      case 0xcd: v = view.getUint16(pos); pos += 2; return v;
+      case 0xce: v = view.getUint32(pos); pos += 4; return v;
+      case 0xcf: v = Number(view.getBigUint64(pos)); pos += 8; return v;
+      case 0xd0: v = view.getInt8(pos); pos += 1; return v;
+      case 0xd1: v = view.getInt16(pos); pos += 2; return v;
+      case 0xd2: v = view.getInt32(pos); pos += 4; return v;
+      case 0xd3: v = Number(view.getBigInt64(pos)); pos += 8; return v;
+      case 0xd9: v = view.getUint8(pos); pos += 1; return str(v);
+      case 0xda: v = view.getUint16(pos); pos += 2; return str(v);
+      case 0xdb: v = view.getUint32(pos); pos += 4; return str(v);
+      case 0xdc: v = view.getUint16(pos); pos += 2; return arr(v);
+      case 0xdd: v = view.getUint32(pos); pos += 4; return arr(v);
+      case 0xde: v = view.getUint16(pos); pos += 2; return map(v);
+      case 0xdf: v = view.getUint32(pos); pos += 4; return map(v);
+      default:
+        throw new Error(`msgpack: unsupported type 0x${b.toString(16)}`);
+    }
+  }
+
+  return read();
+}
+
+export function decodeMessage<T>(data: string | ArrayBuffer): T {
+  if (typeof data === "string") return JSON.parse(data) as T;
+  const msg = unpack(new Uint8Array(data)) as Record<string, unknown>;
+  if ("e" in msg) {
+    msg.event = typeof msg.e === "number" ? EVENT_NAMES[msg.e] ?? msg.e : msg.e;
+    delete msg.e;
+  }
+  return msg as T;
+}